@@ -6,16 +6,33 @@
 
 __version__ = "1.0.0" # <-- AÑADE ESTO
 
+# Lines processed per tick of the queue loop, so the UI stays responsive
+MAX_LINES_PER_TICK = 2000
+
+import os
+import sys
+import json
+import time
+_STARTED = time.perf_counter()
+
 import tkinter as tk
-from tkinter import messagebox
-import webbrowser
+from src.utils import resource_path, StartupTimer
+STARTUP = StartupTimer(_STARTED)
+STARTUP.mark("import tkinter")
+
 from src.i18n import load_translations, set_language, _
-from src.utils import resource_path
 from src.log_parser import parse_logging_event_line, parse_user_property_line, parse_consent_line
+from src.log_parser import classify_line, LINE_EVENT, LINE_USER_PROPERTY, LINE_CONSENT, LINE_SERVICE
 from src.config_manager import load_config, save_config
 from src.adb_manager import check_adb_installed, check_device_connected, LogcatManager, AdbError
-from src.view import View
+from src.view import View, open_url
 from src.model import DataModel
+from src.validator import load_validation_rules
+from src.exporter import ExportJob, model_source, file_source
+from src.exporter import event_record, user_property_record, consent_record
+# The stream server, log file viewer, watches, message boxes and browser are
+# imported on first use, they are not needed to show the window
+STARTUP.mark("import modules")
 
 
 class App:
@@ -26,45 +43,87 @@ class App:
         self.root.iconbitmap(resource_path(
             "./assets/logo-alejandro-reinoso.ico"))
 
-        self.model = DataModel()
+        self.model = DataModel(validation_rules=load_validation_rules())
+        STARTUP.mark("model")
         self.logcat_manager = None
+        self.export_job = None
+        self.diff_job = None
+        self.stream_server = None
+        self.log_file = None
+        self.log_file_loader = None
+        self.polling_queue = False
 
         # --- Load configuration and i18n ---
         self.config_data = load_config()
         default_lang_code = self.config_data.get("language", "en")
         set_language(default_lang_code)
+        STARTUP.mark("config")
 
-        # --- Build the UI ---
+        # --- Build the UI (already in the current language) ---
         self.view = View(self.root, self)
-        self.refresh_ui_texts()
+        STARTUP.mark("build UI")
+        if self.config_data.get("watches"):
+            from src.watches import load_watches
+            self.model.set_watches(load_watches(self.config_data))
+        self.model.dedupe_enabled = self.config_data.get("suppress_duplicates", True)
+        self.view.dedupe_var.set(self.model.dedupe_enabled)
+        if self.config_data.get("stream_server", {}).get("enabled"):
+            self.start_stream_server()
+        STARTUP.mark("restore settings")
+        # Opt-in: set GA_DEBUGGER_STARTUP_TIMINGS=1 to profile the launch
+        if os.environ.get("GA_DEBUGGER_STARTUP_TIMINGS"):
+            self.root.after_idle(self._report_startup)
+
+    def _report_startup(self):
+        """Writes how long each startup phase took to stderr, once the window is painted."""
+        STARTUP.mark("first paint")
+        # There is no console (stderr is None) in the windowed build
+        if sys.stderr is not None:
+            sys.stderr.write(STARTUP.report() + "\n")
 
     def refresh_ui_texts(self):
         """
         Order to the view update all the text to the current language.
         """
         # Menu
-        self.view.menubar.entryconfig(1, label=_("menu.languages"))
-        self.view.menubar.entryconfig(3, label=_("menu.help"))
+        self.view.menubar.entryconfig(
+            self.view.languages_menu_index, label=_("menu.languages"))
+        self.view.menubar.entryconfig(
+            self.view.tools_menu_index, label=_("menu.tools"))
+        self.view.menubar.entryconfig(
+            self.view.help_menu_index, label=_("menu.help"))
 
         # Submenu
         self.view.filemenu.entryconfig(0, label=_("menu.spanish"))
         self.view.filemenu.entryconfig(1, label=_("menu.english"))
 
+        self.view.toolsmenu.entryconfig(0, label=_("menu.statistics"))
+        self.view.toolsmenu.entryconfig(1, label=_("menu.watches"))
+        self.view.toolsmenu.entryconfig(3, label=_("menu.export_session"))
+        self.view.toolsmenu.entryconfig(4, label=_("menu.export_log_file"))
+        self.view.toolsmenu.entryconfig(5, label=_("menu.compare_sessions"))
+        self.view.toolsmenu.entryconfig(7, label=_("menu.stream_server"))
+
         # helpmenu.entryconfig(0, label=_("menu.user_guide"))
         self.view.helpmenu.entryconfig(0, label=_("menu.support"))
         self.view.helpmenu.entryconfig(1, label=_("menu.feedback"))
-        self.view.helpmenu.entryconfig(3, label=_("menu.check_updates"))
-        self.view.helpmenu.entryconfig(5, label=_("menu.about_me"))
+        # helpmenu.entryconfig(3, label=_("menu.check_updates"))
+        self.view.helpmenu.entryconfig(3, label=_("menu.about_me"))
 
         # Action buttons
         self.view.start_button.config(text=_("menu.start_log"))
         self.view.stop_button.config(text=_("menu.stop_log"))
         self.view.clear_button.config(text=_("menu.clear_all"))
+        self.view.open_file_button.config(text=_("menu.open_log_file"))
+        self.view.dedupe_check.config(text=_("dedupe.toggle"))
+        self.view.update_duplicates_label(self.model.deduplicator.suppressed)
 
         # Titles
         self.view.events_title.config(text=_("events.title"))
         self.view.user_props_title.config(text=_("user_props.title"))
         self.view.consent_title.config(text=_("consent.title"))
+        self.view.update_violations_label(
+            sum(self.model.validator.counts.values()))
 
         # Search
         self.view.search_label.config(text=_("search.label"))
@@ -76,15 +135,7 @@ class App:
         self.view.jump_button.config(text=_("search.goto_button"))
         self.view.search_goto_label.config(text=_("search.goto_label"))
 
-        self.view.consent_tree.heading("datetime", text=_("consent.datetime"))
-        self.view.consent_tree.heading(
-            "ad_storage", text=_("consent.ad_storage"))
-        self.view.consent_tree.heading("analytics_storage",
-                                       text=_("consent.analytics_storage"))
-        self.view.consent_tree.heading(
-            "ad_user_data", text=_("consent.ad_user_data"))
-        self.view.consent_tree.heading("ad_personalization",
-                                       text=_("consent.ad_personalization"))
+        self.view.refresh_consent_headings()
 
     def on_language_change(self, new_lang):
         """
@@ -96,67 +147,295 @@ class App:
         self.config_data["language"] = new_lang
         save_config(self.config_data)
 
+    def on_dedupe_toggle(self):
+        """Turns duplicate event suppression on/off and saves it to config."""
+        self.model.dedupe_enabled = self.view.dedupe_var.get()
+        self.config_data["suppress_duplicates"] = self.model.dedupe_enabled
+        save_config(self.config_data)
+
+    def on_event_select(self, ts):
+        """Shows the consent state that was in force when the selected event was logged."""
+        snapshot = self.model.consent_at(ts)
+        self.view.select_consent(self.model.consent_entries.get(snapshot.ts))
+
+    # -----------------------------------------------------
+    # Local Streaming API
+    # -----------------------------------------------------
+
+    def _stream_config(self):
+        from src.stream_server import DEFAULT_PORT
+        return self.config_data.setdefault(
+            "stream_server", {"enabled": False, "port": DEFAULT_PORT})
+
+    def start_stream_server(self):
+        """Starts broadcasting parsed records on localhost. Returns False if it fails."""
+        from src.stream_server import StreamServer, DEFAULT_PORT
+        port = self._stream_config().get("port", DEFAULT_PORT)
+        server = StreamServer(port=port)
+        try:
+            server.start()
+        except OSError as e:
+            self.view.show_error(_("stream.error_title"),
+                                 _("stream.error").format(port=port, error=e))
+            self.view.stream_var.set(False)
+            return False
+        self.stream_server = server
+        self.view.stream_var.set(True)
+        self.view.set_status(_("stream.listening").format(port=port))
+        return True
+
+    def stop_stream_server(self):
+        if self.stream_server:
+            self.stream_server.stop()
+            self.stream_server = None
+        self.view.set_status("")
+
+    def on_stream_toggle(self):
+        """Turns the local streaming API on/off and saves it to config."""
+        if self.view.stream_var.get():
+            enabled = self.start_stream_server()
+        else:
+            self.stop_stream_server()
+            enabled = False
+        self._stream_config()["enabled"] = enabled
+        save_config(self.config_data)
+
+    def _publish(self, record):
+        """Sends a record to the streaming API clients, if it is running."""
+        if self.stream_server:
+            self.stream_server.publish(record)
+
     def handle_adb_error(self, error_type):
         """Function that will be called by the LogcatManager in case of error."""
         if error_type == AdbError.MULTIPLE_DEVICES:
-            messagebox.showerror(_("error.several_devices_title"),
+            self.view.show_error(_("error.several_devices_title"),
                                  _("error.several_devices_description"))
         self.stop_logging()  # Detenemos el log desde el hilo principal de la UI
 
     def check_log_queue(self):
         """Processes log lines from the queue and updates UI accordingly."""
-        while not self.model.log_queue.empty():
+        processed = 0
+        while processed < MAX_LINES_PER_TICK and not self.model.log_queue.empty():
             line = self.model.log_queue.get_nowait()
+            processed += 1
 
-            # 1) Show in console
-            self.view.update_console(line + "\n")
+            kind = classify_line(line)
+
+            # 1) Show in console (a log file is shown by the viewer instead)
+            if self.log_file is None:
+                self.view.update_console(line + "\n", kind)
 
             # 2) “Logging event:”
-            if "Logging event:" in line:
-                ev = parse_logging_event_line(line)
-                if ev:
+            if kind == LINE_EVENT:
+                ev = parse_logging_event_line(line, self.model.clock)
+                if ev and self.model.is_duplicate_event(ev):
+                    self.view.update_duplicates_label(
+                        self.model.deduplicator.suppressed)
+                elif ev:
                     self.model.add_event(ev)
-                    self.view.insert_event_in_tree(ev)
+                    item_id = self.view.insert_event_in_tree(ev)
+                    if ev["violations"]:
+                        self.view.update_violations_label(
+                            sum(self.model.validator.counts.values()))
+                    self._show_dispatches(
+                        self.model.upload_correlator.track(ev, item_id))
+                    self._publish(event_record(ev))
+                    if self.model.watch_matcher:
+                        self._report_watch_hits(
+                            self.model.watch_matcher.match_event(ev),
+                            ev["ts"], ev["name"], self.view.events_tree, item_id)
 
             # 3) “Setting user property:” (excluding "storage consent"/"DMA consent")
-            if "Setting user property:" in line or "Setting user property(FE):" in line:
-                up = parse_user_property_line(line)
+            elif kind == LINE_USER_PROPERTY:
+                up = parse_user_property_line(line, self.model.clock)
                 if up:
-                    self.model.user_properties[up["name"]] = up["value"]
+                    affects_consent = self.model.set_user_property(up)
                     self.view.refresh_user_props_tree(
                         self.model.user_properties)
-                    
-                    if "non_personalized_ads" in up["name"]:
-                        # Creamos un nuevo estado de consentimiento basado en el actual
-                        new_consent_state = self.model.current_consent.copy()
-                        new_consent_state["datetime"] = up["datetime"]
-
-                        # Re-calculamos el valor de ad_personalization
-                        self.model.deduce_ad_personalization(new_consent_state)
-
-                        self._update_consent_view_if_changed(new_consent_state)
+                    self._publish(user_property_record(up))
+                    if self.model.watch_matcher:
+                        self._report_watch_hits(
+                            self.model.watch_matcher.match_user_property(
+                                up, self.model.consent_timeline.current),
+                            up["ts"], f'{up["name"]} = {up["value"]}')
+
+                    if affects_consent:
+                        # Re-evaluate the consent with the new 'non_personalized_ads'
+                        self._update_consent_view_if_changed(
+                            {"ts": up["ts"]})
 
             # 4) “Setting storage consent” / “Setting DMA consent”
-            if ("Setting storage consent" in line) or \
-                ("Setting DMA consent" in line) or \
-                ("Setting consent" in line):
-                c = parse_consent_line(line)
+            elif kind == LINE_CONSENT:
+                c = parse_consent_line(line, self.model.clock)
                 if c:
-                    self.model.fill_missing_consent_fields(c)
-                    self.model.deduce_ad_personalization(c)
                     # Check if consent has actually changed before updating the UI and model state
                     self._update_consent_view_if_changed(c)
 
-        self.root.after(100, self.check_log_queue)
+            # 5) FA-SVC: batches being uploaded
+            elif kind == LINE_SERVICE:
+                self._show_dispatches(
+                    self.model.upload_correlator.feed(line))
+
+        # Come back sooner if there are lines left
+        delay = 1 if processed == MAX_LINES_PER_TICK else 100
+        self.root.after(delay, self.check_log_queue)
+
+    def start_queue_polling(self):
+        """Starts the loop that processes the queue, only once."""
+        if not self.polling_queue:
+            self.polling_queue = True
+            self.check_log_queue()
+
+    def _show_dispatches(self, dispatches):
+        """Marks the events whose upload (or lack of it) has been resolved."""
+        for dispatch in dispatches:
+            self.view.mark_event_dispatch(dispatch.token, dispatch.latency_ms)
+
+    def open_stats_window(self):
+        """Shows the live statistics of the session."""
+        self.view.open_stats_window(self.model.stats)
+
+    # -----------------------------------------------------
+    # Export
+    # -----------------------------------------------------
+
+    def export_session(self):
+        """Exports the captured session in the background."""
+        self._start_export(model_source(self.model))
+
+    def export_log_file(self):
+        """Parses a saved logcat file and exports it in the background."""
+        log_path = self.view.ask_log_file()
+        if log_path:
+            self._start_export(file_source(log_path))
+
+    def _start_export(self, source):
+        if self.export_job and not self.export_job.done:
+            return
+        path = self.view.ask_export_path()
+        if not path:
+            return
+        self.export_job = ExportJob(source, path).start()
+        self._poll_export()
+
+    def _poll_export(self):
+        """Reports the progress of the export job until it finishes."""
+        job = self.export_job
+        if not job.done:
+            self.view.set_status(
+                _("export.progress").format(percent=int(job.progress * 100)))
+            self.root.after(200, self._poll_export)
+        elif job.error:
+            self.view.set_status("")
+            self.view.show_error(_("export.error_title"), job.error)
+        else:
+            self.view.set_status(_("export.done").format(path=job.path))
+
+    # -----------------------------------------------------
+    # Session Diff
+    # -----------------------------------------------------
+
+    def compare_sessions(self):
+        """Compares two recorded sessions in the background and shows the differences."""
+        if self.diff_job and not self.diff_job.done:
+            return
+        old_path = self.view.ask_session_file(_("diff.old_session"))
+        if not old_path:
+            return
+        new_path = self.view.ask_session_file(_("diff.new_session"))
+        if not new_path:
+            return
+        from src.session_diff import DiffJob
+        self.diff_job = DiffJob(old_path, new_path).start()
+        self._poll_diff()
+
+    def _poll_diff(self):
+        """Waits for the diff job and shows its result."""
+        job = self.diff_job
+        if not job.done:
+            self.view.set_status(_("diff.progress"))
+            self.root.after(200, self._poll_diff)
+            return
+        self.view.set_status("")
+        if job.error or job.result is None:
+            self.view.show_error(_("diff.error_title"), job.error or "")
+        else:
+            self.view.open_diff_window(job.result, os.path.basename(job.old_path),
+                                       os.path.basename(job.new_path))
+
+    def save_diff_report(self, report):
+        """Saves a session diff as JSON."""
+        path = self.view.ask_json_path()
+        if not path:
+            return
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            self.view.show_error(_("diff.error_title"), str(e))
 
     def _update_consent_view_if_changed(self, consent_data):
         """Checks for consent changes and updates the model and view accordingly."""
-        if self.model.has_consent_changed(consent_data):
-            # If it has changed, update everything: model and view
-            self.model.current_consent.update(consent_data)
+        snapshot = self.model.apply_consent(consent_data)
+        if snapshot:
+            # If it has changed, update the view
             new_item_id = self.view.insert_consent_in_tree(
                 consent_data, self.model.consent_entries)
-            self.model.consent_entries[consent_data["datetime"]] = new_item_id
+            self.model.consent_entries[consent_data["ts"]] = new_item_id
+            self._publish(consent_record(consent_data))
+            if self.model.watch_matcher:
+                self._report_watch_hits(
+                    self.model.watch_matcher.match_consent(
+                        snapshot, self.model.consent_timeline.previous),
+                    consent_data["ts"], _("consent.title"),
+                    self.view.consent_tree, new_item_id)
+
+    # -----------------------------------------------------
+    # Watch Expressions
+    # -----------------------------------------------------
+
+    def _report_watch_hits(self, hits, ts, summary, tree=None, item_id=None):
+        """Logs the watches matched by a record, highlights its row and rings if asked."""
+        if not hits:
+            return
+        for watch in hits:
+            hit = (ts, watch.name, summary)
+            self.model.watch_hits.append(hit)
+            self.view.add_watch_hit(hit)
+        if tree is not None:
+            self.view.highlight_watch_hit(tree, item_id)
+        if any(watch.sound for watch in hits):
+            self.root.bell()
+
+    def open_watches_window(self):
+        """Shows the watch expressions and the log of hits."""
+        self.view.open_watches_window(
+            self.model.watches, self.model.watch_hits)
+
+    def add_watch(self, name, expression, sound):
+        """Adds a watch expression. Returns False (after telling the user) if it is invalid."""
+        from src.watches import Watch
+        watches = self.model.watches + [
+            Watch(name.strip() or expression.strip(), expression.strip(), sound)]
+        return self._set_watches(watches)
+
+    def remove_watch(self, index):
+        watches = list(self.model.watches)
+        if 0 <= index < len(watches):
+            del watches[index]
+            self._set_watches(watches)
+
+    def _set_watches(self, watches):
+        from src.watches import WatchError, save_watches
+        try:
+            self.model.set_watches(watches)
+        except WatchError as e:
+            self.view.show_error(_("watches.error_title"), str(e))
+            return False
+        save_watches(self.config_data, watches)
+        save_config(self.config_data)
+        self.view.refresh_watches_list(watches)
+        return True
 
     def show_adb_install_dialog(self):
         """
@@ -175,7 +454,7 @@ class App:
         google_button = tk.Button(
             dialog,
             text=_("download_adb"),
-            command=lambda: webbrowser.open(
+            command=lambda: open_url(
                 "https://developer.android.com/tools/releases/platform-tools?hl=es-419")
         )
         google_button.pack(pady=5)
@@ -229,13 +508,18 @@ class App:
             self.show_no_device_dialog()
             return
 
+        # Leave the log file viewer, if open
+        if self.log_file:
+            self.close_log_file()
+            self.clear_all()
+
         # Create and start the manager
         self.logcat_manager = LogcatManager(
             self.model.log_queue, self.handle_adb_error)
         self.logcat_manager.start()
 
         # Start the loop that processes the queue
-        self.check_log_queue()
+        self.start_queue_polling()
         self.view.update_console("\n--- Start log ---\n")
 
     def stop_logging(self):
@@ -243,13 +527,79 @@ class App:
         if self.logcat_manager:
             self.logcat_manager.stop()
             self.logcat_manager = None
-        self.view.update_console("\n--- Stop log ---\n")
+        if self.log_file is None:
+            self.view.update_console("\n--- Stop log ---\n")
 
     def clear_all(self):
         """Clears console, events, user properties, and consent data from the UI."""
+        self.close_log_file()
         self.model.clear_data()
         self.view.clear_ui()
 
+    # -----------------------------------------------------
+    # Open Log File
+    # -----------------------------------------------------
+
+    def open_log_file(self):
+        """Opens a saved logcat file or bugreport .zip in the viewer and parses it in the background."""
+        path = self.view.ask_log_file()
+        if not path:
+            return
+        if self.logcat_manager:
+            self.stop_logging()
+        self.clear_all()
+
+        try:
+            # The log can not be newer than the file, that tells its year
+            self.model.clock.reset(os.path.getmtime(path))
+        except OSError as e:
+            self.view.show_error(_("log_file.error_title"), str(e))
+            return
+
+        # The file is opened by the loader thread: a bugreport .zip is
+        # decompressed there, not on the UI thread
+        from src.log_file import LogFile, LogFileLoader
+        log_file = LogFile(path)
+        self.log_file = log_file
+        self.log_file_loader = LogFileLoader(log_file, self.model.log_queue).start()
+        self.view.attach_log_file(log_file)
+        self.start_queue_polling()
+        self._poll_log_file()
+
+    def _poll_log_file(self):
+        """Refreshes the viewer while the file is being indexed."""
+        log_file = self.log_file
+        if log_file is None:
+            return
+        error = self.log_file_loader.error
+        if error is not None:
+            self.close_log_file()
+            self.view.show_error(_("log_file.error_title"), error)
+            return
+        self.view.render_log_file()
+        if log_file.done:
+            self.view.set_status(
+                _("log_file.loaded").format(lines=log_file.line_count))
+        else:
+            self.view.set_status(
+                _("log_file.loading").format(percent=int(log_file.progress * 100)))
+            self.root.after(500, self._poll_log_file)
+
+    def close_log_file(self):
+        """Stops the background pass and closes the log file, if any."""
+        if self.log_file is None:
+            return
+        self.log_file_loader.stop()
+        self.log_file_loader.thread.join(timeout=1)
+        self.log_file_loader = None
+        # Forget the lines already queued from the file
+        while not self.model.log_queue.empty():
+            self.model.log_queue.get_nowait()
+        self.view.detach_log_file()
+        self.log_file.close()
+        self.log_file = None
+        self.view.set_status("")
+
     # -----------------------------------------------------
     # Search Functionality in Log Text Area
     # -----------------------------------------------------
@@ -345,7 +695,9 @@ class App:
 
 if __name__ == "__main__":
     load_translations()
+    STARTUP.mark("translations")
 
     root = tk.Tk()
+    STARTUP.mark("create window")
     app = App(root)
     root.mainloop()
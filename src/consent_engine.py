@@ -0,0 +1,103 @@
+# Android GA Tracking Debugger
+# Copyright (c) 2025 Alejandro Reinoso
+#
+# This software is licensed under the Custom Shared-Profit License (CSPL) v1.0.
+# See the LICENSE.txt file for details.
+
+'''
+consent_engine.py resolves the Consent Mode state from consent lines and
+the 'non_personalized_ads' user property
+'''
+
+
+# --- Resolution rules --- #
+
+def explicit_or_previous(fallback=None):
+    """
+    The value logged in the line, else the last known value,
+    else (optionally) the already resolved value of another field.
+    """
+    def rule(incoming, previous, resolved, engine):
+        if incoming is not None:
+            return incoming
+        if previous is not None:
+            return previous
+        if fallback is not None:
+            return resolved[fallback]
+        return None
+    return rule
+
+
+def npa_or_previous(fallback=None):
+    """
+    Deduced from the 'non_personalized_ads' user property, else the last
+    known value, else (optionally) the already resolved value of another field.
+    The value logged in the line is ignored, the user property has priority.
+    """
+    def rule(incoming, previous, resolved, engine):
+        if engine.npa == '0':
+            return "granted"
+        if engine.npa == '1':
+            return "denied"
+        if previous is not None:
+            return previous
+        if fallback is not None:
+            return resolved[fallback]
+        return None
+    return rule
+
+
+# Evaluated in order, so a rule can fall back on any field above it.
+# New Consent Mode signals only need a new row here.
+CONSENT_RULES = (
+    ("ad_storage", explicit_or_previous()),
+    ("analytics_storage", explicit_or_previous()),
+    ("ad_user_data", explicit_or_previous(fallback="ad_storage")),
+    ("ad_personalization", npa_or_previous(fallback="ad_storage")),
+)
+
+CONSENT_FIELDS = tuple(field for field, _rule in CONSENT_RULES)
+
+NPA_PROPERTY = "non_personalized_ads"
+
+
+class ConsentEngine:
+    def __init__(self, rules=CONSENT_RULES):
+        self.rules = rules
+        self.current = {field: None for field, _rule in rules}
+        self._state = tuple(self.current.values())
+        self.npa = None
+
+    def set_user_property(self, name, value):
+        """
+        Tracks the 'non_personalized_ads' user property.
+        Returns True if the property affects the consent state.
+        """
+        if NPA_PROPERTY not in name:
+            return False
+        self.npa = value.strip()
+        return True
+
+    def apply(self, consent_data):
+        """
+        Fills every consent field of 'consent_data' in place following the rules.
+        Returns True (and makes it the current state) if the state has changed.
+        """
+        resolved = {}
+        for field, rule in self.rules:
+            resolved[field] = rule(consent_data.get(field), self.current[field],
+                                   resolved, self)
+        consent_data.update(resolved)
+
+        state = tuple(resolved.values())
+        if state == self._state:
+            return False
+        self._state = state
+        self.current = resolved
+        return True
+
+    def reset(self):
+        """Forgets the consent state and the tracked user property."""
+        self.current = {field: None for field, _rule in self.rules}
+        self._state = tuple(self.current.values())
+        self.npa = None
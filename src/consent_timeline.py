@@ -0,0 +1,67 @@
+# Android GA Tracking Debugger
+# Copyright (c) 2025 Alejandro Reinoso
+#
+# This software is licensed under the Custom Shared-Profit License (CSPL) v1.0.
+# See the LICENSE.txt file for details.
+
+'''
+consent_timeline.py keeps the history of consent states of the session
+'''
+
+import bisect
+from collections import namedtuple
+from src.consent_engine import CONSENT_FIELDS
+
+# Immutable consent state. Events keep a reference to the snapshot that was
+# in force when they were logged, so many events share the same object.
+ConsentSnapshot = namedtuple(
+    "ConsentSnapshot", ("ts",) + CONSENT_FIELDS + ("non_personalized_ads",))
+
+EMPTY_CONSENT = ConsentSnapshot(*([None] * len(ConsentSnapshot._fields)))
+
+
+class ConsentTimeline:
+    def __init__(self):
+        self._times = []
+        self._snapshots = []
+        self.current = EMPTY_CONSENT
+        self.previous = EMPTY_CONSENT
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    def __iter__(self):
+        return iter(self._snapshots)
+
+    def record(self, consent_data, non_personalized_ads=None):
+        """Appends a new snapshot built from the consent dict and makes it current."""
+        values = {k: consent_data.get(k) for k in CONSENT_FIELDS}
+        snapshot = self.current._replace(
+            ts=consent_data["ts"],
+            non_personalized_ads=non_personalized_ads,
+            **values)
+
+        # Logcat lines may arrive slightly out of order; keep the index sorted.
+        time_key = snapshot.ts
+        if self._times and time_key < self._times[-1]:
+            time_key = self._times[-1]
+
+        self._times.append(time_key)
+        self._snapshots.append(snapshot)
+        self.previous = self.current
+        self.current = snapshot
+        return snapshot
+
+    def at(self, ts):
+        """Returns the snapshot in force at the given timestamp key (O(log n))."""
+        i = bisect.bisect_right(self._times, ts)
+        if i == 0:
+            return EMPTY_CONSENT
+        return self._snapshots[i - 1]
+
+    def clear(self):
+        """Forgets every snapshot."""
+        self._times.clear()
+        self._snapshots.clear()
+        self.current = EMPTY_CONSENT
+        self.previous = EMPTY_CONSENT
@@ -0,0 +1,69 @@
+# Android GA Tracking Debugger
+# Copyright (c) 2025 Alejandro Reinoso
+#
+# This software is licensed under the Custom Shared-Profit License (CSPL) v1.0.
+# See the LICENSE.txt file for details.
+
+'''
+dedupe.py detects the same hit logged more than once (FA and FA-SVC tags).
+Identical lines of the same tag are real repeats (e.g. an event fired twice)
+and are never suppressed.
+'''
+
+from collections import OrderedDict
+from src.log_parser import strip_alias
+from src.timestamps import timestamp_ms
+
+
+def event_fingerprint(ev):
+    """Hash of the normalized event name and parameters."""
+    params = frozenset((strip_alias(k), v) for k, v in ev["params"].items())
+    return hash((strip_alias(ev["name"]), params))
+
+
+class EventDeduplicator:
+    def __init__(self, window_ms=1000, max_entries=2048):
+        self.window_ms = window_ms
+        self.max_entries = max_entries
+        # fingerprint => [time in ms, {tag: hits not yet matched by another tag}],
+        # oldest first
+        self.seen = OrderedDict()
+        self.suppressed = 0
+
+    def is_duplicate(self, ev):
+        """
+        Returns True if the same event was already seen from the other tag
+        within the tolerance window. Otherwise remembers it and returns False.
+        """
+        time_ms = timestamp_ms(ev["ts"])
+
+        # Forget what is too old or too much, memory stays flat
+        seen = self.seen
+        while seen:
+            oldest_key, (oldest_time, _hits) = next(iter(seen.items()))
+            if oldest_time >= time_ms - self.window_ms and len(seen) < self.max_entries:
+                break
+            del seen[oldest_key]
+
+        key = event_fingerprint(ev)
+        tag = ev.get("tag")
+        entry = seen.get(key)
+        if entry is None or abs(time_ms - entry[0]) > self.window_ms:
+            entry = seen[key] = [time_ms, {}]
+        else:
+            # Each hit hides at most one copy logged by the other tag
+            hits = entry[1]
+            for other_tag, count in hits.items():
+                if other_tag != tag and count:
+                    hits[other_tag] = count - 1
+                    self.suppressed += 1
+                    return True
+
+        entry[0] = time_ms
+        entry[1][tag] = entry[1].get(tag, 0) + 1
+        seen.move_to_end(key)
+        return False
+
+    def clear(self):
+        self.seen.clear()
+        self.suppressed = 0
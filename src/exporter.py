@@ -0,0 +1,250 @@
+# Android GA Tracking Debugger
+# Copyright (c) 2025 Alejandro Reinoso
+#
+# This software is licensed under the Custom Shared-Profit License (CSPL) v1.0.
+# See the LICENSE.txt file for details.
+
+'''
+exporter.py streams the session records (events, user properties and consent)
+to JSONL, CSV or Parquet files
+'''
+
+import os
+import csv
+import json
+import heapq
+import threading
+from src.consent_engine import CONSENT_FIELDS, ConsentEngine
+from src.log_parser import (classify_line, parse_logging_event_line,
+                            parse_user_property_line, parse_consent_line,
+                            LINE_EVENT, LINE_USER_PROPERTY, LINE_CONSENT)
+from src.timestamps import LogClock, format_timestamp, timestamp_ms, timestamp_seq
+
+EXPORT_FORMATS = {".jsonl": "jsonl", ".csv": "csv", ".parquet": "parquet"}
+
+BASE_COLUMNS = ("type", "ts", "seq", "datetime", "origin", "name", "value") + CONSENT_FIELDS
+INTEGER_COLUMNS = ("ts", "seq")
+PARAM_PREFIX = "param:"
+
+PARQUET_BATCH_ROWS = 10000
+
+
+class ExportError(Exception):
+    pass
+
+
+# --- Records --- #
+# 'ts' is in milliseconds since 1970 (device time), 'seq' orders the records
+# of the same millisecond and 'datetime' is the text of both
+
+def _time_fields(key):
+    if key is None:
+        return {"ts": None, "seq": None, "datetime": ""}
+    return {"ts": timestamp_ms(key), "seq": timestamp_seq(key),
+            "datetime": format_timestamp(key, True)}
+
+
+def event_record(ev):
+    return {"type": "event", **_time_fields(ev["ts"]),
+            "origin": ev.get("origin"), "name": ev["name"], "params": ev["params"]}
+
+
+def user_property_record(up):
+    return {"type": "user_property", **_time_fields(up.get("ts")),
+            "name": up["name"], "value": up["value"]}
+
+
+def consent_record(consent):
+    """'consent' is a consent dict or a ConsentSnapshot."""
+    if hasattr(consent, "_asdict"):
+        consent = consent._asdict()
+    record = {"type": "consent", **_time_fields(consent["ts"])}
+    for field in CONSENT_FIELDS:
+        record[field] = consent.get(field)
+    return record
+
+
+# --- Sources --- #
+# A source is a function returning an iterator of (record, progress from 0 to 1),
+# so it can be read more than once without keeping the records in memory.
+
+def model_source(model):
+    """Records of the live session, in time order like file_source()."""
+    # Bound the export to what has been captured so far
+    events = model.events_data
+    total_events = len(events)
+    user_properties = model.user_property_history
+    total_user_properties = len(user_properties)
+    snapshots = list(model.consent_timeline)
+
+    def iterate():
+        total = max(1, len(snapshots) + total_user_properties + total_events)
+        # A consent change caused by a user property shares its key: the
+        # user property goes first (heapq.merge keeps the argument order on ties)
+        merged = heapq.merge(
+            ((up["ts"], user_property_record, up)
+             for up in user_properties[:total_user_properties]),
+            ((snapshot.ts, consent_record, snapshot) for snapshot in snapshots),
+            ((events[i]["ts"], event_record, events[i]) for i in range(total_events)),
+            key=lambda item: item[0])
+        for done, (_ts, to_record, item) in enumerate(merged, 1):
+            yield to_record(item), done / total
+    return iterate
+
+
+def file_source(path):
+    """Records of a saved logcat file (or bugreport .zip), parsed line by line."""
+
+    def iterate():
+        from src.log_file import LogFile
+        engine = ConsentEngine()
+        # The log can not be newer than the file, that tells its year
+        clock = LogClock(reference=os.path.getmtime(path))
+        log_file = LogFile(path).open()
+        size = max(1, log_file.size)
+        try:
+            for _start, end, lines in log_file.iter_blocks():
+                progress = end / size
+                for line in lines:
+                    for record in _line_records(line, engine, clock):
+                        yield record, progress
+        finally:
+            log_file.close()
+    return iterate
+
+
+def _line_records(line, engine, clock):
+    """Records produced by one logcat line."""
+    kind = classify_line(line)
+    if kind == LINE_EVENT:
+        ev = parse_logging_event_line(line, clock)
+        if ev:
+            yield event_record(ev)
+    elif kind == LINE_USER_PROPERTY:
+        up = parse_user_property_line(line, clock)
+        if up:
+            yield user_property_record(up)
+            if engine.set_user_property(up["name"], up["value"]):
+                c = {"ts": up["ts"]}
+                if engine.apply(c):
+                    yield consent_record(c)
+    elif kind == LINE_CONSENT:
+        c = parse_consent_line(line, clock)
+        if c and engine.apply(c):
+            yield consent_record(c)
+
+
+# --- Writers --- #
+
+def _param_columns(source, on_progress):
+    """First pass: one column per parameter key of the events (first half of the progress)."""
+    keys = set()
+    for record, progress in source():
+        if record["type"] == "event":
+            keys.update(record["params"])
+        on_progress(progress / 2)
+    return [PARAM_PREFIX + k for k in sorted(keys)]
+
+
+def _second_half(on_progress):
+    return lambda progress: on_progress(0.5 + progress / 2)
+
+
+def _flat_row(record):
+    row = {k: v for k, v in record.items() if k != "params"}
+    for k, v in record.get("params", {}).items():
+        row[PARAM_PREFIX + k] = v
+    return row
+
+
+def write_jsonl(source, path, on_progress):
+    with open(path, "w", encoding="utf-8") as f:
+        for record, progress in source():
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write("\n")
+            on_progress(progress)
+
+
+def write_csv(source, path, on_progress):
+    columns = list(BASE_COLUMNS) + _param_columns(source, on_progress)
+    on_progress = _second_half(on_progress)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        for record, progress in source():
+            writer.writerow(_flat_row(record))
+            on_progress(progress)
+
+
+def write_parquet(source, path, on_progress):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportError("Parquet export requires 'pyarrow' (pip install pyarrow).")
+
+    columns = list(BASE_COLUMNS) + _param_columns(source, on_progress)
+    on_progress = _second_half(on_progress)
+    schema = pa.schema([(c, pa.int64() if c in INTEGER_COLUMNS else pa.string())
+                        for c in columns])
+
+    def flush(rows, writer):
+        data = {c: [row.get(c) for row in rows] for c in columns}
+        writer.write_table(pa.Table.from_pydict(data, schema=schema))
+        rows.clear()
+
+    with pq.ParquetWriter(path, schema) as writer:
+        rows = []
+        for record, progress in source():
+            row = _flat_row(record)
+            rows.append({k: v if v is None or k in INTEGER_COLUMNS else str(v)
+                         for k, v in row.items()})
+            if len(rows) >= PARQUET_BATCH_ROWS:
+                flush(rows, writer)
+                on_progress(progress)
+        if rows:
+            flush(rows, writer)
+
+
+WRITERS = {"jsonl": write_jsonl, "csv": write_csv, "parquet": write_parquet}
+
+
+def export_format(path):
+    """Returns the format matching the file extension, or None."""
+    return EXPORT_FORMATS.get(os.path.splitext(path)[1].lower())
+
+
+class ExportJob:
+    """Runs an export in a background thread. Poll 'progress', 'done' and 'error'."""
+
+    def __init__(self, source, path, fmt=None):
+        self.source = source
+        self.path = path
+        self.format = fmt or export_format(path)
+        self.progress = 0.0
+        self.done = False
+        self.error = None
+        self.thread = None
+
+    def _set_progress(self, progress):
+        self.progress = progress
+
+    def _run(self):
+        try:
+            writer = WRITERS.get(self.format)
+            if writer is None:
+                raise ExportError(f"Unknown export format: {self.path}")
+            writer(self.source, self.path, self._set_progress)
+            self.progress = 1.0
+        except (ExportError, OSError, ValueError) as e:
+            self.error = str(e)
+        except Exception as e:
+            # Anything else must still end the job, or the UI would poll forever
+            self.error = f"{type(e).__name__}: {e}"
+        finally:
+            self.done = True
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
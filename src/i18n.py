@@ -6,6 +6,7 @@
 
 import os
 import json
+from src.utils import resource_path
 
 
 '''
@@ -14,25 +15,41 @@ import json
 TRANSLATIONS = {}
 CURRENT_LANG = "en"  # Default fallback language
 
+# Texts of the current language, resolved once per language by set_language()
+_LOOKUP = {}
+_RESOLVED = {}
+
 
 def load_translations():
     """Loads translations from the 'locales.json' file."""
     global TRANSLATIONS
-    path_locales = "locales.json"
+    path_locales = resource_path("locales.json")
 
     if not os.path.exists(path_locales):
         print("'locales.json' not found; hardcoded literals will be used.")
         TRANSLATIONS = {}
-        return
+    else:
+        with open(path_locales, "r", encoding="utf-8") as f:
+            TRANSLATIONS = json.load(f)
+    _RESOLVED.clear()
+    set_language(CURRENT_LANG)
+
 
-    with open(path_locales, "r", encoding="utf-8") as f:
-        TRANSLATIONS = json.load(f)
+def _resolve(lang):
+    """Texts of 'lang', completed with the default language ones."""
+    lookup = _RESOLVED.get(lang)
+    if lookup is None:
+        lookup = dict(TRANSLATIONS.get("en", {}))
+        lookup.update(TRANSLATIONS.get(lang, {}))
+        _RESOLVED[lang] = lookup
+    return lookup
 
 
 def set_language(lang):
     """Changes the current language (e.g., 'es', 'en', etc.)."""
-    global CURRENT_LANG
+    global CURRENT_LANG, _LOOKUP
     CURRENT_LANG = lang
+    _LOOKUP = _resolve(lang)
 
 
 def _(key):
@@ -40,4 +57,4 @@ def _(key):
     Returns the translated text based on the key and current language.
     If not found, returns the key itself as fallback.
     """
-    return TRANSLATIONS.get(CURRENT_LANG, {}).get(key, key)
+    return _LOOKUP.get(key, key)
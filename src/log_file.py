@@ -0,0 +1,214 @@
+# Android GA Tracking Debugger
+# Copyright (c) 2025 Alejandro Reinoso
+#
+# This software is licensed under the Custom Shared-Profit License (CSPL) v1.0.
+# See the LICENSE.txt file for details.
+
+'''
+log_file.py gives random access to the lines of saved logcat files
+(memory-mapped) and of bugreport .zip archives
+'''
+
+import io
+import os
+import mmap
+import bisect
+import zipfile
+import threading
+from array import array
+from src.log_parser import split_logcat_line, classify_line, LINE_OTHER
+
+# Lines are indexed by blocks: only the offset of the first line of each
+# block is stored, so the index of a multi-gigabyte file stays small.
+BLOCK_SIZE = 64 * 1024
+
+GA_TAGS = ("FA", "FA-SVC")
+
+
+def _bugreport_member(zf):
+    """Name of the main text file of a bugreport archive."""
+    names = zf.namelist()
+    if "main_entry.txt" in names:
+        entry = zf.read("main_entry.txt").decode("utf-8", errors="replace").strip()
+        if entry in names:
+            return entry
+    candidates = [info for info in zf.infolist()
+                  if info.filename.endswith(".txt") and "bugreport" in info.filename]
+    if not candidates:
+        raise ValueError("No bugreport text file found in the archive.")
+    return max(candidates, key=lambda info: info.file_size).filename
+
+
+def read_bugreport_logcat(path):
+    """
+    Streams the bugreport inside a .zip (without extracting it to disk) and
+    returns the FA / FA-SVC lines of its logcat sections as bytes.
+    """
+    out = io.BytesIO()
+    with zipfile.ZipFile(path) as zf:
+        with zf.open(_bugreport_member(zf)) as member:
+            in_logcat = False
+            for raw in member:
+                if raw.startswith(b"------ "):
+                    # "------ SYSTEM LOG (logcat -v threadtime ...) ------" opens a section,
+                    # "------ 0.5s was the duration of 'SYSTEM LOG' ------" closes it
+                    in_logcat = b"logcat" in raw and b"was the duration" not in raw
+                    continue
+                if not in_logcat:
+                    continue
+                line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+                parts = split_logcat_line(line)
+                if parts and parts[1] in GA_TAGS:
+                    out.write(line.encode("utf-8"))
+                    out.write(b"\n")
+    return out.getvalue()
+
+
+class LogFile:
+    def __init__(self, path):
+        self.path = path
+        self.data = None        # mmap or bytes
+        self._file = None
+        self.size = 0
+        # Block index: byte offset and number of the first line of each block
+        self.block_offsets = array("q")
+        self.block_lines = array("q")
+        self.line_count = 0     # Lines indexed so far
+        self.indexed_bytes = 0
+        self.done = False
+        self._cache = {}
+
+    def open(self):
+        """Maps the file (or reads the logcat of a bugreport .zip)."""
+        if zipfile.is_zipfile(self.path):
+            self.data = read_bugreport_logcat(self.path)
+        else:
+            self._file = open(self.path, "rb")
+            if os.fstat(self._file.fileno()).st_size == 0:
+                self.data = b""
+            else:
+                self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.size = len(self.data)
+        return self
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        if self._file:
+            self._file.close()
+            self._file = None
+        self.data = None
+        self._cache.clear()
+
+    @property
+    def progress(self):
+        if self.done:
+            return 1.0
+        return self.indexed_bytes / self.size if self.size else 0.0
+
+    def _decode(self, raw):
+        return raw.decode("utf-8", errors="replace").rstrip("\r")
+
+    def iter_blocks(self):
+        """Yields (start offset, end offset, decoded lines) of consecutive blocks."""
+        data = self.data
+        pos = 0
+        while pos < self.size:
+            end = data.find(b"\n", min(pos + BLOCK_SIZE, self.size) - 1)
+            end = self.size if end == -1 else end + 1
+            raw_lines = data[pos:end].split(b"\n")
+            if raw_lines[-1] == b"":
+                raw_lines.pop()  # The block ends with a newline
+            yield pos, end, [self._decode(raw) for raw in raw_lines]
+            pos = end
+
+    def index(self, on_block=None, stop_event=None):
+        """
+        Builds the line index, block by block. 'on_block(lines)' receives the
+        decoded lines of each indexed block (used by the background parse pass).
+        """
+        for start, end, lines in self.iter_blocks():
+            if stop_event is not None and stop_event.is_set():
+                return
+            self.block_offsets.append(start)
+            self.block_lines.append(self.line_count)
+            if on_block is not None:
+                on_block(lines)
+            # Bytes first: readers rely on line_count to know what is indexed
+            self.indexed_bytes = end
+            self.line_count += len(lines)
+        self.done = True
+
+    def _block(self, b):
+        """Decoded lines of the block 'b', with a small cache for scrolling."""
+        lines = self._cache.get(b)
+        if lines is None:
+            start = self.block_offsets[b]
+            end = self.block_offsets[b + 1] if b + 1 < len(self.block_offsets) \
+                else self.indexed_bytes
+            count = (self.block_lines[b + 1] if b + 1 < len(self.block_lines)
+                     else self.line_count) - self.block_lines[b]
+            lines = [self._decode(raw)
+                     for raw in self.data[start:end].split(b"\n")[:count]]
+            if len(self._cache) > 8:
+                self._cache.clear()
+            self._cache[b] = lines
+        return lines
+
+    def get_lines(self, start, count):
+        """Returns up to 'count' lines from line number 'start' (indexed lines only)."""
+        result = []
+        end = min(start + count, self.line_count)
+        line_no = max(0, start)
+        while line_no < end:
+            b = bisect.bisect_right(self.block_lines, line_no) - 1
+            lines = self._block(b)
+            first = line_no - self.block_lines[b]
+            take = lines[first:first + (end - line_no)]
+            if not take:
+                break
+            result.extend(take)
+            line_no += len(take)
+        return result
+
+
+class LogFileLoader:
+    """
+    Opens and indexes a LogFile in a background thread (reading a bugreport
+    .zip takes a while) and pushes the lines meant for the parsers into
+    'log_queue', pausing while the queue is full. Poll 'error'.
+    """
+
+    def __init__(self, log_file, log_queue, max_queued=5000):
+        self.log_file = log_file
+        self.log_queue = log_queue
+        self.max_queued = max_queued
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.error = None
+
+    def _on_block(self, lines):
+        for line in lines:
+            if classify_line(line) != LINE_OTHER:
+                while self.log_queue.qsize() > self.max_queued:
+                    if self.stop_event.wait(0.05):
+                        return
+                self.log_queue.put(line)
+
+    def _run(self):
+        try:
+            if self.log_file.data is None:
+                self.log_file.open()
+        except (OSError, ValueError, zipfile.BadZipFile) as e:
+            self.error = str(e)
+            return
+        if not self.stop_event.is_set():
+            self.log_file.index(self._on_block, self.stop_event)
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
@@ -5,11 +5,57 @@
 # See the LICENSE.txt file for details.
 
 import re
+from src.consent_engine import CONSENT_FIELDS
 
+ALIAS_SUFFIX = re.compile(r"\(_\w+\)$")
 
-def parse_logging_event_line(line):
-    """Parses a logging event line for event name, datetime and parameters."""
-    datetime_str = line[:18].strip()
+# '-v time' => "MM-DD HH:MM:SS.mmm L/TAG( PID): msg"
+# '-v threadtime' (bugreports) => "MM-DD HH:MM:SS.mmm [UID] PID  TID L TAG : msg"
+LOGCAT_LINE = re.compile(
+    r"^\d\d-\d\d \d\d:\d\d:\d\d\.\d+\s+"
+    r"(?:([VDIWEFA])/([^(\s]+)\s*\(\s*\d+\)|(?:\S+\s+)?\d+\s+\d+\s+([VDIWEFA])\s+(\S+)\s*)"
+    r":\s?(.*)$")
+
+# Kinds of line, see classify_line()
+LINE_OTHER = 0
+LINE_EVENT = 1
+LINE_USER_PROPERTY = 2
+LINE_CONSENT = 3
+LINE_SERVICE = 4
+
+def strip_alias(name):
+    """Removes the short alias logged by the SDK, e.g. 'screen_view(_vs)' => 'screen_view'."""
+    return ALIAS_SUFFIX.sub("", name)
+
+
+def split_logcat_line(line):
+    """Returns (level, tag, message) of a logcat line, or None if it is not one."""
+    m = LOGCAT_LINE.match(line)
+    if not m:
+        return None
+    if m.group(1):
+        return m.group(1), m.group(2), m.group(5)
+    return m.group(3), m.group(4), m.group(5)
+
+
+def classify_line(line):
+    """Tells which parser (if any) a logcat line is meant for."""
+    if "Logging event:" in line:
+        return LINE_EVENT
+    if "Setting user property:" in line or "Setting user property(FE):" in line:
+        return LINE_USER_PROPERTY
+    if ("Setting storage consent" in line) or \
+        ("Setting DMA consent" in line) or \
+            ("Setting consent" in line):
+        return LINE_CONSENT
+    if "FA-SVC" in line:
+        return LINE_SERVICE
+    return LINE_OTHER
+
+
+def parse_logging_event_line(line, clock):
+    """Parses a logging event line for event name, timestamp key and parameters."""
+    origin_match = re.search(r"origin=([^,]+)", line)
     name_match = re.search(r"name=([^,]+)", line)
     params_match = re.search(r"params=Bundle\[\{(.*)\}\]", line)
     if not name_match or not params_match:
@@ -25,16 +71,18 @@ def parse_logging_event_line(line):
             k, v = pair.split('=', 1)
             params_dict[k.strip()] = v.strip()
 
+    parts = split_logcat_line(line)
     return {
-        "datetime": datetime_str,
+        "ts": clock.stamp(line),
+        "tag": parts[1] if parts else None,
+        "origin": origin_match.group(1).strip() if origin_match else None,
         "name": event_name,
         "params": params_dict
     }
 
 
-def parse_user_property_line(line):
+def parse_user_property_line(line, clock):
     """Parses a line for user property settings."""
-    datetime_str = line[:18].strip()
     pat = r"Setting user property:\s+([^,]+),\s+(.*)"
     m = re.search(pat, line)
     if not m:
@@ -44,30 +92,50 @@ def parse_user_property_line(line):
             return None
 
     return {
-        "datetime": datetime_str,
+        "ts": clock.stamp(line),
         "name": m.group(1).strip(),
         "value": m.group(2).strip()
     }
 
 
-def parse_consent_line(line):
+def parse_consent_line(line, clock):
     """Parses a line containing consent data into a dictionary format."""
-    datetime_str = line[:18].strip()
     found = re.findall(r'(\w+)=(\w+)', line)
-    cdict = {
-        "datetime": datetime_str,
-        "ad_storage": None,
-        "analytics_storage": None,
-        "ad_user_data": None,
-        "ad_personalization": None,
-    }
+    cdict = dict.fromkeys(CONSENT_FIELDS)
     for (k, v) in found:
         key_lower = k.lower()
-        if key_lower in cdict:  # ad_storage, analytics_storage, ad_user_data, ad_personalization
+        if key_lower in cdict:  # ad_storage, analytics_storage, ...
             cdict[key_lower] = v
 
-    if (cdict["ad_storage"] is None
-        and cdict["analytics_storage"] is None
-            and cdict["ad_user_data"] is None):
+    if all(cdict[field] is None for field in CONSENT_FIELDS):
         return None
+    cdict["ts"] = clock.stamp(line)
     return cdict
+
+
+def parse_upload_start_line(line, clock):
+    """Parses the FA-SVC line that starts the upload of a batch of bundles."""
+    m = re.search(r"Uploading data\. app, uncompressed size, data: ([^,]+), (\d+)", line)
+    if not m:
+        return None
+    return {
+        "ts": clock.stamp(line),
+        "app": m.group(1).strip(),
+        "size": int(m.group(2))
+    }
+
+
+def parse_upload_result_line(line, clock):
+    """Parses the FA-SVC line with the network response of an upload."""
+    if "Successful upload" in line:
+        success = True
+    elif "upload failed" in line.lower():
+        success = False
+    else:
+        return None
+    m = re.search(r"code, \w+: (-?\d+)", line)
+    return {
+        "ts": clock.stamp(line),
+        "success": success,
+        "code": int(m.group(1)) if m else None
+    }
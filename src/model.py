@@ -9,86 +9,105 @@ model.py manage the status of the app
 '''
 
 import queue
+from collections import deque
+from src.consent_engine import ConsentEngine
+from src.consent_timeline import ConsentTimeline
+from src.validator import Validator
+from src.stats import SessionStats
+from src.dedupe import EventDeduplicator
+from src.upload_correlator import UploadCorrelator
+from src.timestamps import LogClock
 
 
 class DataModel:
-    def __init__(self):
+    def __init__(self, validation_rules=None):
         self.log_queue = queue.Queue()
+        self.clock = LogClock()
         self.events_data = []
         self.user_properties = {}
-        self.current_consent = {
-            "ad_storage": None, "analytics_storage": None,
-            "ad_user_data": None, "ad_personalization": None
-        }
-        self.consent_entries = {}
+        self.user_property_history = []  # Parsed user property lines, in order
+        self.consent_engine = ConsentEngine()
+        self.consent_entries = {}  # timestamp key => consent tree item
+        self.consent_timeline = ConsentTimeline()
+        self.validator = Validator(validation_rules or {})
+        self.stats = SessionStats()
+        self.dedupe_enabled = True
+        self.deduplicator = EventDeduplicator()
+        self.upload_correlator = UploadCorrelator(self.clock)
+        self.watch_matcher = None  # Compiled on the first set_watches()
+        self.watch_hits = deque(maxlen=1000)  # (timestamp key, watch name, summary)
         self.search_matches = []
         self.current_match_index = -1
 
-    def fill_missing_consent_fields(self, c):
-        """Fill in consent fields with 'current_consent' if they don't appear, 
-        ad_user_data => if there isn't a previous one => ad_storage."""
-        if c["ad_storage"] is None:
-            c["ad_storage"] = self.current_consent["ad_storage"]
-        if c["analytics_storage"] is None:
-            c["analytics_storage"] = self.current_consent["analytics_storage"]
-        if c["ad_user_data"] is None:
-            if self.current_consent["ad_user_data"] is not None:
-                c["ad_user_data"] = self.current_consent["ad_user_data"]
-            else:
-                c["ad_user_data"] = c["ad_storage"]
+    @property
+    def current_consent(self):
+        """The last resolved consent state."""
+        return self.consent_engine.current
 
-    def deduce_ad_personalization(self, c):
+    def set_user_property(self, up):
         """
-        Deduces ad_personalization status with a single logical exit point,
-        following a priority order:
-        1. User property 'non_personalized_ads'.
-        2. The last known ad_personalization status.
-        3. As a last resort, the current value of ad_storage.
+        Stores a parsed user property ({ts, name, value}) and its history.
+        Returns True if it affects the consent state ('non_personalized_ads').
         """
-        determined_status = None
+        self.user_properties[up["name"]] = up["value"]
+        self.user_property_history.append(up)
+        return self.consent_engine.set_user_property(up["name"], up["value"])
 
-        # 1. Try to get the direct signal from the user property (_npa).
-        npa_key = next(
-            (k for k in self.user_properties if "non_personalized_ads" in k), None)
-
-        if npa_key:
-            val = self.user_properties[npa_key].strip()
-            if val == '0':
-                determined_status = "granted"
-            elif val == '1':
-                determined_status = "denied"
-
-        # 2. If a status has not yet been determined, use fallbacks.
-        if determined_status is None:
-            if self.current_consent["ad_personalization"] is not None:
-                determined_status = self.current_consent["ad_personalization"]
-            else:
-                # 3. As a last resort, use the ad_storage value.
-                determined_status = c["ad_storage"]
+    def apply_consent(self, consent_data):
+        """
+        Resolves the missing consent fields of 'consent_data' in place.
+        If the consent state has changed, records it in the timeline and
+        returns the new snapshot, otherwise returns None.
+        """
+        if not self.consent_engine.apply(consent_data):
+            return None
+        return self.consent_timeline.record(consent_data, self.consent_engine.npa)
 
-        # Single point of modification
-        c["ad_personalization"] = determined_status
+    def is_duplicate_event(self, event_data):
+        """True if duplicate suppression is on and the event was already logged."""
+        return self.dedupe_enabled and self.deduplicator.is_duplicate(event_data)
 
     def add_event(self, event_data):
-        """Add a new event to the data list."""
+        """
+        Add a new event to the data list, tagged with the consent in force
+        and the violations of the validation rules.
+        """
+        event_data["consent"] = self.consent_timeline.current
+        event_data["violations"] = self.validator.check(event_data)
         self.events_data.append(event_data)
+        self.stats.add_event(event_data)
+
+    @property
+    def watches(self):
+        return self.watch_matcher.watches if self.watch_matcher else []
+
+    def set_watches(self, watches):
+        """Compiles the watch expressions. Raises WatchError if one is invalid."""
+        # Imported here: without watches the parser and compiler are not needed
+        from src.watches import WatchMatcher
+        self.watch_matcher = WatchMatcher(watches) if watches else None
 
-    def clear_data(self):
-        """Clears all session data."""
-        self.events_data.clear()
+    def consent_at(self, ts):
+        """Returns the consent snapshot in force at the given timestamp key."""
+        return self.consent_timeline.at(ts)
+
+    def clear_data(self, reference=None):
+        """
+        Clears all session data. 'reference' (seconds since 1970) tells the
+        year of the next lines, now by default.
+        """
+        self.clock.reset(reference)
+        # New list, so a background export keeps reading the old one
+        self.events_data = []
+        self.user_property_history = []
         self.user_properties.clear()
         self.consent_entries.clear()
+        self.consent_timeline.clear()
+        self.consent_engine.reset()
+        self.validator.reset()
+        self.stats.clear()
+        self.deduplicator.clear()
+        self.upload_correlator.clear()
+        self.watch_hits.clear()
         self.search_matches.clear()
         self.current_match_index = -1
-        self.current_consent.update({k: None for k in self.current_consent})
-
-    def has_consent_changed(self, new_filled_consent):
-        """
-        Checks if the new, filled consent state is different from the current one.
-        """
-        has_changed = False
-        keys_to_check = ["ad_storage", "analytics_storage", "ad_user_data", "ad_personalization"]
-        for key in keys_to_check:
-            if new_filled_consent.get(key) != self.current_consent.get(key):
-                has_changed = True
-        return has_changed
\ No newline at end of file
@@ -0,0 +1,443 @@
+# Android GA Tracking Debugger
+# Copyright (c) 2025 Alejandro Reinoso
+#
+# This software is licensed under the Custom Shared-Profit License (CSPL) v1.0.
+# See the LICENSE.txt file for details.
+
+'''
+session_diff.py compares the tracking of two recorded sessions (saved logcat
+files, bugreport .zip or exported .jsonl): added, removed and changed events,
+parameters and consent transitions.
+
+Events are aligned by name: the common prefix and suffix are trimmed, names
+logged once in both sessions anchor the alignment (patience diff) and the
+gaps between anchors are aligned with Myers' LCS, up to an edit limit so a
+100k-event session never goes quadratic. Gaps beyond the limit are aligned
+window by window (approximate, but still bounded).
+
+Usage: python -m src.session_diff old.log new.log [-o diff.json] [--ignore p1,p2]
+(exits with 1 when the sessions differ, like diff)
+'''
+
+import sys
+import json
+import bisect
+import argparse
+import threading
+from src.consent_engine import CONSENT_FIELDS
+from src.log_parser import strip_alias
+
+# Parameters that change on every run and would flag every event as changed
+DEFAULT_IGNORED_PARAMS = frozenset((
+    "ga_session_id", "ga_session_number", "engagement_time_msec",
+    "ga_screen_id", "ga_previous_screen_id", "firebase_screen_id",
+    "firebase_previous_id", "ga_event_id",
+))
+
+# Edits allowed to Myers' algorithm on a gap between anchors; beyond it the
+# gap is aligned window by window
+MAX_EDIT_DISTANCE = 1000
+# Items per side of each window of that fallback
+FALLBACK_WINDOW = 200
+# Items in a row that must match to line the windows up again after a
+# block only found on one side
+RESYNC_GRAM = 8
+
+
+# --- Loading --- #
+
+def load_session(path):
+    """Returns (events, consent changes) records of a session file."""
+    if path.lower().endswith(".jsonl"):
+        records = _jsonl_records(path)
+    else:
+        from src.exporter import file_source
+        records = (record for record, _progress in file_source(path)())
+    events, consents = [], []
+    for record in records:
+        if record.get("type") == "event":
+            events.append(record)
+        elif record.get("type") == "consent":
+            consents.append(record)
+    return events, consents
+
+
+def _jsonl_records(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+# --- Alignment --- #
+
+def _myers(a, b, max_d):
+    """
+    Matched index pairs of the longest common subsequence of a and b
+    (Myers' O((N+M)D) algorithm), or None if they need more than max_d edits.
+    """
+    n, m = len(a), len(b)
+    offset = n + m + 1
+    v = [0] * (2 * offset + 1)
+    trace = []
+    for d in range(min(max_d, n + m) + 1):
+        trace.append(v[offset - d:offset + d + 1] if d else [v[offset]])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return _myers_backtrack(a, b, trace, v, d, offset)
+    return None
+
+
+def _myers_backtrack(a, b, trace, v, d, offset):
+    pairs = []
+    x, y = len(a), len(b)
+    for depth in range(d, 0, -1):
+        prev = trace[depth]  # V before step 'depth', diagonals -depth..depth
+        k = x - y
+        if k == -depth or (k != depth and prev[k - 1 + depth] < prev[k + 1 + depth]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = prev[prev_k + depth]
+        prev_y = prev_x - prev_k
+        while x > prev_x and y > prev_y:
+            x -= 1
+            y -= 1
+            pairs.append((x, y))
+        x, y = prev_x, prev_y
+    while x > 0 and y > 0:
+        x -= 1
+        y -= 1
+        pairs.append((x, y))
+    pairs.reverse()
+    return pairs
+
+
+def _unique_anchors(a, alo, ahi, b, blo, bhi):
+    """Pairs of the items that appear exactly once in both ranges, in LIS order."""
+    count_a, pos_a = {}, {}
+    for i in range(alo, ahi):
+        count_a[a[i]] = count_a.get(a[i], 0) + 1
+        pos_a[a[i]] = i
+    count_b, pos_b = {}, {}
+    for j in range(blo, bhi):
+        count_b[b[j]] = count_b.get(b[j], 0) + 1
+        pos_b[b[j]] = j
+    candidates = sorted((pos_a[item], pos_b[item]) for item, n in count_a.items()
+                        if n == 1 and count_b.get(item) == 1)
+    if not candidates:
+        return []
+
+    # Longest increasing subsequence on the positions in b (patience sorting)
+    tails, tail_index, back = [], [], [None] * len(candidates)
+    for idx, (_i, j) in enumerate(candidates):
+        pile = bisect.bisect_left(tails, j)
+        back[idx] = tail_index[pile - 1] if pile else None
+        if pile == len(tails):
+            tails.append(j)
+            tail_index.append(idx)
+        else:
+            tails[pile] = j
+            tail_index[pile] = idx
+    anchors = []
+    idx = tail_index[-1]
+    while idx is not None:
+        anchors.append(candidates[idx])
+        idx = back[idx]
+    anchors.reverse()
+    return anchors
+
+
+def _gram_index(seq, gram):
+    """Start positions (increasing) of every run of 'gram' items of seq."""
+    index = {}
+    for p in range(len(seq) - gram + 1):
+        index.setdefault(tuple(seq[p:p + gram]), []).append(p)
+    return index
+
+
+def _resync(a, b, i, j, window, gram, grams_a, grams_b):
+    """
+    Nearest (p, q), p >= i and q >= j, where a and b share a run of 'gram'
+    items, looking at the runs starting in the next window of either side.
+    Returns None if there is none.
+    """
+    best, best_cost = None, None
+    for seq, start, other_start, grams, swap in ((a, i, j, grams_b, False),
+                                                 (b, j, i, grams_a, True)):
+        for p in range(start, min(start + window, len(seq) - gram + 1)):
+            if best_cost is not None and p - start >= best_cost:
+                break
+            positions = grams.get(tuple(seq[p:p + gram]))
+            if not positions:
+                continue
+            k = bisect.bisect_left(positions, other_start)
+            if k == len(positions):
+                continue
+            cost = (p - start) + (positions[k] - other_start)
+            if best_cost is None or cost < best_cost:
+                best_cost = cost
+                best = (positions[k], p) if swap else (p, positions[k])
+    return best
+
+
+def _windowed(a, b, window=FALLBACK_WINDOW, gram=RESYNC_GRAM):
+    """
+    Approximate matched index pairs of a and b: Myers (up to half a window of
+    edits) on a window of each, keeping the matches of the first half and
+    moving the windows past them. When a window has no match (a block only
+    found on one side), the windows are lined up again on the nearest run of
+    'gram' items found in both.
+    """
+    pairs = []
+    half = window // 2
+    grams_a, grams_b = _gram_index(a, gram), _gram_index(b, gram)
+    i = j = 0
+    while i < len(a) and j < len(b):
+        last = i + window >= len(a) and j + window >= len(b)
+        matched = _myers(a[i:i + window], b[j:j + window], half) or []
+        if not last:
+            matched = [(x, y) for x, y in matched if x < half and y < half]
+        if matched:
+            pairs.extend((i + x, j + y) for x, y in matched)
+            if last:
+                break
+            i, j = i + matched[-1][0] + 1, j + matched[-1][1] + 1
+            continue
+
+        resync = _resync(a, b, i, j, window, gram, grams_a, grams_b)
+        if resync is None:
+            i += half
+            j += half
+            continue
+        # The run itself is matched, so the windows always move forward
+        p, q = resync
+        pairs.extend((p + t, q + t) for t in range(gram))
+        i, j = p + gram, q + gram
+    return pairs
+
+
+def align(a, b, max_d=MAX_EDIT_DISTANCE):
+    """
+    Aligns two sequences of hashable items. Returns (matched index pairs in
+    increasing order, True if some gap exceeded max_d and was aligned approximately).
+    """
+    pairs = []
+    truncated = False
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+        # Common prefix and suffix
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            pairs.append((alo, blo))
+            alo += 1
+            blo += 1
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+            pairs.append((ahi, bhi))
+        if alo == ahi or blo == bhi:
+            continue
+
+        anchors = _unique_anchors(a, alo, ahi, b, blo, bhi)
+        if anchors:
+            i0, j0 = alo, blo
+            for i, j in anchors:
+                pairs.append((i, j))
+                stack.append((i0, i, j0, j))
+                i0, j0 = i + 1, j + 1
+            stack.append((i0, ahi, j0, bhi))
+            continue
+
+        matched = _myers(a[alo:ahi], b[blo:bhi], max_d)
+        if matched is None:
+            truncated = True
+            matched = _windowed(a[alo:ahi], b[blo:bhi])
+        pairs.extend((alo + i, blo + j) for i, j in matched)
+    pairs.sort()
+    return pairs, truncated
+
+
+# --- Diff --- #
+
+def _event_key(record):
+    return strip_alias(record["name"])
+
+
+def _params(record, ignored):
+    return {k: v for k, v in ((strip_alias(k), v) for k, v in record["params"].items())
+            if k not in ignored}
+
+
+def diff_params(old, new):
+    """Returns the parameter changes between two param dicts, or None if equal."""
+    if old == new:
+        return None
+    return {
+        "added": {k: new[k] for k in new.keys() - old.keys()},
+        "removed": {k: old[k] for k in old.keys() - new.keys()},
+        "changed": {k: [old[k], new[k]] for k in old.keys() & new.keys() if old[k] != new[k]},
+    }
+
+
+def _walk(pairs, len_a, len_b):
+    """Yields (index in a or None, index in b or None) covering both sequences in order."""
+    i = j = 0
+    for pi, pj in pairs + [(len_a, len_b)]:
+        while i < pi:
+            yield i, None
+            i += 1
+        while j < pj:
+            yield None, j
+            j += 1
+        if pi < len_a:
+            yield pi, pj
+        i, j = pi + 1, pj + 1
+
+
+def _event_entry(op, old, new, params=None):
+    record = old if new is None else new
+    entry = {"op": op, "name": _event_key(record),
+             "old_datetime": old and old.get("datetime"),
+             "new_datetime": new and new.get("datetime")}
+    if params is not None:
+        entry["params"] = params
+    return entry
+
+
+def _consent_state(record):
+    return tuple(record.get(field) for field in CONSENT_FIELDS)
+
+
+def diff_sessions(old, new, ignored_params=DEFAULT_IGNORED_PARAMS, max_d=MAX_EDIT_DISTANCE):
+    """
+    Compares two sessions as returned by load_session(). Returns a JSON-ready
+    report; unchanged events are only counted.
+    """
+    old_events, old_consents = old
+    new_events, new_consents = new
+    ignored = frozenset(strip_alias(p) for p in ignored_params)
+
+    # Intern the names so the alignment compares small ints
+    ids = {}
+    a = [ids.setdefault(_event_key(ev), len(ids)) for ev in old_events]
+    b = [ids.setdefault(_event_key(ev), len(ids)) for ev in new_events]
+    pairs, truncated = align(a, b, max_d)
+
+    events = []
+    counts = {"added": 0, "removed": 0, "changed": 0, "unchanged": 0}
+    for i, j in _walk(pairs, len(a), len(b)):
+        if j is None:
+            counts["removed"] += 1
+            events.append(_event_entry("removed", old_events[i], None))
+        elif i is None:
+            counts["added"] += 1
+            events.append(_event_entry("added", None, new_events[j]))
+        else:
+            changes = diff_params(_params(old_events[i], ignored),
+                                  _params(new_events[j], ignored))
+            if changes is None:
+                counts["unchanged"] += 1
+            else:
+                counts["changed"] += 1
+                events.append(_event_entry("changed", old_events[i], new_events[j], changes))
+
+    # Consent transitions, aligned by the resulting state
+    a = [_consent_state(c) for c in old_consents]
+    b = [_consent_state(c) for c in new_consents]
+    consent_pairs, consent_truncated = align(a, b, max_d)
+    consent = []
+    for i, j in _walk(consent_pairs, len(a), len(b)):
+        if i is None or j is None:
+            record = new_consents[j] if i is None else old_consents[i]
+            entry = {"op": "added" if i is None else "removed",
+                     "datetime": record.get("datetime")}
+            entry.update(zip(CONSENT_FIELDS, _consent_state(record)))
+            consent.append(entry)
+
+    name_counts = {}
+    for ev in old_events:
+        name_counts.setdefault(_event_key(ev), [0, 0])[0] += 1
+    for ev in new_events:
+        name_counts.setdefault(_event_key(ev), [0, 0])[1] += 1
+
+    return {
+        "summary": dict(counts, old_events=len(old_events), new_events=len(new_events),
+                        consent_added=sum(c["op"] == "added" for c in consent),
+                        consent_removed=sum(c["op"] == "removed" for c in consent)),
+        "truncated": truncated or consent_truncated,
+        "event_counts": {name: n for name, n in sorted(name_counts.items()) if n[0] != n[1]},
+        "events": events,
+        "consent": consent,
+    }
+
+
+class DiffJob:
+    """Loads and compares two sessions in a background thread. Poll 'done' and 'error'."""
+
+    def __init__(self, old_path, new_path, ignored_params=DEFAULT_IGNORED_PARAMS):
+        self.old_path = old_path
+        self.new_path = new_path
+        self.ignored_params = ignored_params
+        self.result = None
+        self.done = False
+        self.error = None
+        self.thread = None
+
+    def _run(self):
+        try:
+            self.result = diff_sessions(load_session(self.old_path),
+                                        load_session(self.new_path),
+                                        self.ignored_params)
+        except (OSError, ValueError) as e:
+            self.error = str(e)
+        except Exception as e:
+            # Malformed input (e.g. a JSONL line that is not an object) must
+            # still end the job with an error
+            self.error = f"{type(e).__name__}: {e}"
+        finally:
+            self.done = True
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m src.session_diff",
+        description="Compares the tracking of two recorded sessions.")
+    parser.add_argument("old", help="logcat file, bugreport .zip or exported .jsonl")
+    parser.add_argument("new", help="logcat file, bugreport .zip or exported .jsonl")
+    parser.add_argument("-o", "--output", help="write the JSON report to this file")
+    parser.add_argument("--ignore", default=None,
+                        help="comma-separated parameters to ignore "
+                             "(default: session ids, screen ids, engagement time)")
+    args = parser.parse_args(argv)
+
+    ignored = DEFAULT_IGNORED_PARAMS if args.ignore is None else \
+        frozenset(p.strip() for p in args.ignore.split(",") if p.strip())
+    report = diff_sessions(load_session(args.old), load_session(args.new), ignored)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text + "\n")
+    summary = report["summary"]
+    return 1 if summary["added"] or summary["removed"] or summary["changed"] \
+        or summary["consent_added"] or summary["consent_removed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
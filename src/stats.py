@@ -0,0 +1,147 @@
+# Android GA Tracking Debugger
+# Copyright (c) 2025 Alejandro Reinoso
+#
+# This software is licensed under the Custom Shared-Profit License (CSPL) v1.0.
+# See the LICENSE.txt file for details.
+
+'''
+stats.py keeps live aggregate statistics of the captured events
+'''
+
+import math
+import time
+from collections import Counter
+from src.log_parser import strip_alias
+from src.timestamps import timestamp_ms
+
+
+class RateWindow:
+    """
+    Counts hits over a sliding window using a ring of time buckets.
+    Adding is O(1) and memory is fixed, whatever the ingest volume.
+    """
+
+    def __init__(self, window_ms=60000, buckets=60):
+        self.bucket_ms = window_ms // buckets
+        self.counts = [0] * buckets
+        self.stamps = [-1] * buckets
+
+    def add(self, time_ms):
+        bucket = time_ms // self.bucket_ms
+        idx = bucket % len(self.counts)
+        if self.stamps[idx] != bucket:
+            self.stamps[idx] = bucket
+            self.counts[idx] = 0
+        self.counts[idx] += 1
+
+    def count(self, now_ms):
+        """Returns the number of hits in the window ending at 'now_ms'."""
+        newest = now_ms // self.bucket_ms
+        oldest = newest - len(self.counts)
+        return sum(c for c, stamp in zip(self.counts, self.stamps)
+                   if oldest < stamp <= newest)
+
+
+class CardinalityEstimator:
+    """
+    Distinct values seen: exact for a few values, then a HyperLogLog sketch
+    with 2^precision registers (about 3% error with the default of 10).
+    """
+
+    EXACT_LIMIT = 64
+
+    def __init__(self, precision=10):
+        self.precision = precision
+        self.values = set()
+        self.registers = None
+
+    def add(self, value):
+        if self.registers is None:
+            self.values.add(value)
+            if len(self.values) > self.EXACT_LIMIT:
+                self.registers = bytearray(1 << self.precision)
+                for v in self.values:
+                    self._add_hashed(v)
+                self.values = None
+        else:
+            self._add_hashed(value)
+
+    def _add_hashed(self, value):
+        h = hash(value) & 0xFFFFFFFFFFFFFFFF
+        idx = h >> (64 - self.precision)
+        rest = (h << self.precision) & 0xFFFFFFFFFFFFFFFF
+        rank = 64 - self.precision + 1 if rest == 0 else 65 - rest.bit_length()
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+
+    def estimate(self):
+        if self.registers is None:
+            return len(self.values)
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            # Small range correction (linear counting)
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+
+class SessionStats:
+    def __init__(self, window_ms=60000, clock=time.monotonic):
+        self.window_ms = window_ms
+        self.clock = clock  # Seconds, to tell how long the stream has been quiet
+        self.totals = Counter()
+        self.rates = {}
+        self.cardinality = {}
+        self.last_time_ms = None
+        self._last_seen = None  # self.clock() when last_time_ms was updated
+
+    def add_event(self, ev):
+        """Updates every aggregate with a parsed event."""
+        name = strip_alias(ev["name"])
+        self.totals[name] += 1
+
+        time_ms = timestamp_ms(ev["ts"])
+        if self.last_time_ms is None or time_ms > self.last_time_ms:
+            self.last_time_ms = time_ms
+            self._last_seen = self.clock()
+        rate = self.rates.get(name)
+        if rate is None:
+            rate = self.rates[name] = RateWindow(self.window_ms)
+        rate.add(time_ms)
+
+        for k, v in ev["params"].items():
+            key = strip_alias(k)
+            estimator = self.cardinality.get(key)
+            if estimator is None:
+                estimator = self.cardinality[key] = CardinalityEstimator()
+            estimator.add(v)
+
+    def now_ms(self):
+        """
+        Device time now: the latest event time moved forward by the time
+        passed since, so the rates drop when the stream goes quiet.
+        """
+        if self.last_time_ms is None:
+            return None
+        return self.last_time_ms + int((self.clock() - self._last_seen) * 1000)
+
+    def event_rows(self):
+        """Returns (event name, total, events in the last window) sorted by total."""
+        now = self.now_ms()
+        return [(name, total,
+                 self.rates[name].count(now) if name in self.rates else 0)
+                for name, total in self.totals.most_common()]
+
+    def param_rows(self):
+        """Returns (parameter, distinct values) sorted by parameter name."""
+        return [(key, self.cardinality[key].estimate())
+                for key in sorted(self.cardinality)]
+
+    def clear(self):
+        self.totals.clear()
+        self.rates.clear()
+        self.cardinality.clear()
+        self.last_time_ms = None
+        self._last_seen = None
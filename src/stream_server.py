@@ -0,0 +1,164 @@
+# Android GA Tracking Debugger
+# Copyright (c) 2025 Alejandro Reinoso
+#
+# This software is licensed under the Custom Shared-Profit License (CSPL) v1.0.
+# See the LICENSE.txt file for details.
+
+'''
+stream_server.py broadcasts the parsed records to local tools as
+newline-delimited JSON over TCP.
+
+Each client receives one JSON record per line. A client may send a line
+like {"events": ["purchase", "screen_view"]} to only receive those events
+(user property and consent records are always sent), or {"events": null}
+to receive everything again.
+'''
+
+import json
+import socket
+import threading
+from collections import deque
+from src.log_parser import strip_alias
+
+DEFAULT_PORT = 8765
+
+
+class _Subscriber:
+    def __init__(self, conn, buffer_size):
+        self.conn = conn
+        self.buffer = deque(maxlen=buffer_size)
+        self.cond = threading.Condition()
+        self.events = None  # None => every event
+        self.dropped = 0
+        self.closed = False
+
+    def wants(self, record):
+        if record["type"] != "event" or self.events is None:
+            return True
+        return strip_alias(record["name"]) in self.events
+
+    def offer(self, data):
+        """Queues a serialized record without blocking; the oldest is dropped when full."""
+        with self.cond:
+            if len(self.buffer) == self.buffer.maxlen:
+                self.dropped += 1
+            self.buffer.append(data)
+            self.cond.notify()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+
+    def send_loop(self):
+        """Writes the queued records to the socket, in its own thread."""
+        try:
+            while True:
+                with self.cond:
+                    while not self.buffer and not self.closed:
+                        self.cond.wait()
+                    if self.closed:
+                        return
+                    chunk = list(self.buffer)
+                    self.buffer.clear()
+                    dropped, self.dropped = self.dropped, 0
+                if dropped:
+                    notice = json.dumps({"type": "dropped", "count": dropped}) + "\n"
+                    chunk.insert(0, notice.encode("utf-8"))
+                self.conn.sendall(b"".join(chunk))
+        except OSError:
+            self.close()
+
+    def read_loop(self):
+        """Reads the filter commands sent by the client, in its own thread."""
+        try:
+            for line in self.conn.makefile("r", encoding="utf-8"):
+                try:
+                    command = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(command, dict) and "events" in command:
+                    names = command["events"]
+                    self.events = None if names is None else frozenset(
+                        strip_alias(str(n)) for n in names)
+        except (OSError, ValueError):
+            pass
+        self.close()
+
+
+class StreamServer:
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, buffer_size=1000):
+        self.host = host
+        self.port = port
+        self.buffer_size = buffer_size
+        self.subscribers = []  # Replaced, never modified in place
+        self.lock = threading.Lock()
+        self.server_socket = None
+        self.accept_thread = None
+        self.running = threading.Event()
+
+    def start(self):
+        """Binds the port and starts accepting clients. Raises OSError if the port is busy."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if hasattr(socket, "SO_EXCLUSIVEADDRUSE"):
+            # Windows: SO_REUSEADDR would let another process bind the same port
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
+        else:
+            # Rebind right after a restart (TIME_WAIT)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.bind((self.host, self.port))
+            sock.listen()
+        except OSError:
+            sock.close()
+            raise
+        # Timeout so the accept loop notices when the server is stopped
+        sock.settimeout(0.5)
+        self.server_socket = sock
+        self.running.set()
+        self.accept_thread = threading.Thread(target=self._accept_loop, daemon=True)
+        self.accept_thread.start()
+
+    def _accept_loop(self):
+        sock = self.server_socket
+        while self.running.is_set():
+            try:
+                conn, _addr = sock.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return  # Server socket closed
+            sub = _Subscriber(conn, self.buffer_size)
+            with self.lock:
+                self.subscribers = self.subscribers + [sub]
+            threading.Thread(target=sub.send_loop, daemon=True).start()
+            threading.Thread(target=sub.read_loop, daemon=True).start()
+
+    def publish(self, record):
+        """Sends a record to every interested client. Never blocks the caller."""
+        data = None
+        any_closed = False
+        for sub in self.subscribers:
+            if sub.closed:
+                any_closed = True
+            elif sub.wants(record):
+                if data is None:
+                    data = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+                sub.offer(data)
+        if any_closed:
+            with self.lock:
+                self.subscribers = [sub for sub in self.subscribers if not sub.closed]
+
+    def stop(self):
+        self.running.clear()
+        if self.server_socket:
+            self.server_socket.close()
+            self.server_socket = None
+        with self.lock:
+            subscribers, self.subscribers = self.subscribers, []
+        for sub in subscribers:
+            sub.close()
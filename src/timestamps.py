@@ -0,0 +1,139 @@
+# Android GA Tracking Debugger
+# Copyright (c) 2025 Alejandro Reinoso
+#
+# This software is licensed under the Custom Shared-Profit License (CSPL) v1.0.
+# See the LICENSE.txt file for details.
+
+'''
+timestamps.py turns the 'MM-DD HH:MM:SS.mmm' prefix of the logcat lines into
+sortable integer keys.
+
+A key is (milliseconds since 1970 in device time << TIE_BITS) | sequence, so
+lines logged in the same millisecond keep their order and never share a key.
+Display strings are only built when shown (format_timestamp).
+'''
+
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+
+TIE_BITS = 10
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+DAY_MS = 86400 * 1000
+
+# A jump back larger than this is a new year ('-v time' has no year)
+ROLLOVER_MS = 180 * DAY_MS
+# Milliseconds whose tie sequence is remembered (lines may be slightly out of order)
+MAX_TIES = 4096
+
+
+def timestamp_ms(key):
+    """Milliseconds since 1970 (device time) of a key."""
+    return key >> TIE_BITS
+
+
+def timestamp_seq(key):
+    """Order of a key among the lines logged in the same millisecond."""
+    return key & ((1 << TIE_BITS) - 1)
+
+
+def format_timestamp(key, with_year=False):
+    """'MM-DD HH:MM:SS.mmm' (or 'YYYY-MM-DD ...') of a key, '' for None."""
+    if key is None:
+        return ""
+    days, ms = divmod(key >> TIE_BITS, DAY_MS)
+    day = date.fromordinal(EPOCH_ORDINAL + days)
+    seconds, millis = divmod(ms, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    text = f"{day.month:02d}-{day.day:02d} {hours:02d}:{minutes:02d}:{seconds:02d}.{millis:03d}"
+    return f"{day.year:04d}-{text}" if with_year else text
+
+
+class LogClock:
+    """
+    Stamps the lines of one logcat stream with unique keys that sort by device
+    time (lines of the same millisecond in arrival order). The year is inferred from
+    'reference' (seconds since 1970, now by default: the log can not be from
+    the future) and moved forward when the log crosses New Year.
+    """
+
+    def __init__(self, reference=None):
+        self.reset(reference)
+
+    def reset(self, reference=None):
+        self.reference = time.time() if reference is None else reference
+        self.year = None
+        self.last_ms = None     # Latest time seen, to detect New Year
+        self.line_ms = None     # Time of the previous line
+        self._days = {}  # 'MM-DD' => days since 1970 in self.year
+        self._ties = OrderedDict()  # ms => next sequence number
+
+    def _day(self, month_day):
+        days = self._days.get(month_day)
+        if days is None:
+            try:
+                days = date(self.year, int(month_day[:2]), int(month_day[3:5])).toordinal()
+            except ValueError:
+                if month_day != "02-29":
+                    return None
+                # The inferred year is not a leap year: keep the line right
+                # after 02-28 rather than dropping its time
+                days = date(self.year, 2, 28).toordinal() + 1
+            days = self._days[month_day] = days - EPOCH_ORDINAL
+        return days
+
+    def _infer_year(self, month_day):
+        """Latest year in which the date is valid and not after the reference."""
+        ref = date.fromtimestamp(self.reference)
+        # A day of slack for devices in another time zone
+        limit = ref + timedelta(days=1)
+        month, day = int(month_day[:2]), int(month_day[3:5])
+        self.year = ref.year
+        for year in range(limit.year, limit.year - 9, -1):  # 02-29 => last leap year
+            try:
+                if date(year, month, day) <= limit:
+                    self.year = year
+                    return
+            except ValueError:
+                continue
+
+    def _line_ms(self, line):
+        """Device time of the line prefix in ms, or None if it has no timestamp."""
+        if len(line) < 18 or line[2] != "-" or line[5] != " " or line[14] != ".":
+            return None
+        try:
+            ms_of_day = ((int(line[6:8]) * 60 + int(line[9:11])) * 60
+                         + int(line[12:14])) * 1000 + int(line[15:18])
+        except ValueError:
+            return None
+        if self.year is None:
+            self._infer_year(line[:5])
+        days = self._day(line[:5])
+        if days is None:
+            return None
+        ms = days * DAY_MS + ms_of_day
+        if self.last_ms is not None and ms < self.last_ms - ROLLOVER_MS:
+            self.year += 1
+            self._days.clear()
+            days = self._day(line[:5])
+            if days is None:
+                return None
+            ms = days * DAY_MS + ms_of_day
+        return ms
+
+    def stamp(self, line):
+        """Key of a logcat line. Lines without a timestamp take the previous line's time."""
+        ms = self._line_ms(line)
+        if ms is None:
+            ms = int(self.reference * 1000) if self.line_ms is None else self.line_ms
+        elif self.last_ms is None or ms > self.last_ms:
+            self.last_ms = ms
+        self.line_ms = ms
+
+        # The time is kept as is (also for display), the sequence breaks ties
+        seq = self._ties.get(ms, 0)
+        self._ties[ms] = seq + 1
+        if len(self._ties) > MAX_TIES:
+            self._ties.popitem(last=False)
+        return (ms << TIE_BITS) | min(seq, (1 << TIE_BITS) - 1)
@@ -0,0 +1,240 @@
+# Android GA Tracking Debugger
+# Copyright (c) 2025 Alejandro Reinoso
+#
+# This software is licensed under the Custom Shared-Profit License (CSPL) v1.0.
+# See the LICENSE.txt file for details.
+
+'''
+upload_correlator.py matches every logged event with the FA-SVC upload
+batch that carried it and measures the dispatch latency
+'''
+
+import re
+from collections import OrderedDict, deque, namedtuple
+from src.log_parser import (split_logcat_line, parse_logging_event_line,
+                            parse_upload_start_line, parse_upload_result_line,
+                            classify_line, LINE_EVENT)
+from src.timestamps import LogClock, timestamp_ms
+
+ALIASED_NAME = re.compile(r"^\w+\((_\w+)\)$")
+
+# latency_ms is None when the event was never uploaded
+Dispatch = namedtuple("Dispatch", ("token", "event", "latency_ms"))
+
+
+def upload_key(name):
+    """
+    Key to match an event name with the names in the batch dump, which may
+    use either 'screen_view(_vs)' or just the alias '_vs'.
+    """
+    name = name.strip().strip("'\"")
+    m = ALIASED_NAME.match(name)
+    return m.group(1) if m else name
+
+
+class _Pending:
+    __slots__ = ("token", "event", "key", "time_ms", "done")
+
+    def __init__(self, token, event, key, time_ms):
+        self.token = token
+        self.event = event
+        self.key = key
+        self.time_ms = time_ms
+        self.done = False
+
+
+class UploadCorrelator:
+    def __init__(self, clock, max_pending=5000, max_age_ms=30 * 60 * 1000,
+                 max_awaiting=256, max_await_ms=2 * 60 * 1000):
+        self.clock = clock  # Same clock as the parsed events
+        self.max_pending = max_pending
+        self.max_age_ms = max_age_ms
+        self.max_awaiting = max_awaiting
+        self.max_await_ms = max_await_ms
+        self._pending = OrderedDict()    # id => _Pending, oldest first
+        self._by_key = {}                # upload key => deque of _Pending
+        self._next_id = 0
+        # Batch being dumped: stack of open blocks and event names found
+        self._stack = None
+        self._batch_names = None
+        self._batch_ms = None
+        # Batches dumped and waiting for the network response:
+        # (event names or None if not dumped, upload start time)
+        self._awaiting = deque()
+        # Batches whose response was never seen (given up by age or limit)
+        self.dropped_uploads = 0
+
+    def track(self, ev, token=None):
+        """
+        Starts waiting for the upload of a logged event.
+        Returns the events given up because of age or the pending limit.
+        """
+        time_ms = timestamp_ms(ev["ts"])
+        entry = _Pending(token, ev, upload_key(ev["name"]), time_ms)
+        self._pending[self._next_id] = entry
+        self._next_id += 1
+        self._by_key.setdefault(entry.key, deque()).append(entry)
+        return self._expire(time_ms)
+
+    def feed(self, line):
+        """
+        Processes an FA-SVC line. Returns the dispatches resolved by it:
+        uploaded events with their latency or events given up.
+        """
+        # A new upload or a network response also ends a dump cut short
+        # (logcat truncates long entries, the closing braces may never come)
+        start = parse_upload_start_line(line, self.clock)
+        if start:
+            if self._stack is not None:
+                self._end_dump()
+            self._stack = []
+            self._batch_names = None  # Until the dump opens a block
+            self._batch_ms = timestamp_ms(start["ts"])
+            self._feed_dump(line)
+            return []
+
+        result = parse_upload_result_line(line, self.clock)
+        if result is None:
+            if self._stack is not None:
+                self._feed_dump(line)
+            return []
+
+        if self._stack is not None:
+            self._end_dump()
+        time_ms = timestamp_ms(result["ts"])
+        # A response is not older than the network timeout: batches still
+        # waiting from before lost their response line
+        while self._awaiting and self._awaiting[0][1] < time_ms - self.max_await_ms:
+            self._awaiting.popleft()
+            self.dropped_uploads += 1
+        if self._awaiting:
+            names, start_ms = self._awaiting.popleft()
+            if result["success"]:
+                if names is None:
+                    resolved = self._resolve_all(start_ms, time_ms)
+                else:
+                    resolved = self._resolve(names, time_ms)
+                return resolved + self._expire(time_ms)
+            # On failure the events stay pending, the SDK will retry them
+        return []
+
+    def _feed_dump(self, line):
+        """Follows the nested blocks of the batch dump collecting event names."""
+        parts = split_logcat_line(line)
+        message = (parts[2] if parts else line).strip()
+
+        if message.endswith("{"):
+            words = message[:-1].split()
+            if self._batch_names is None:
+                self._batch_names = []
+            self._stack.append(words[-1] if words else "")
+        elif message == "}":
+            if self._stack:
+                self._stack.pop()
+            if not self._stack:
+                self._end_dump()
+        elif message.startswith("name:") and self._stack and self._stack[-1] == "event":
+            self._batch_names.append(upload_key(message[5:]))
+        elif not self._stack and not message.startswith("Uploading data."):
+            # The batch was not dumped (no verbose dump), nothing to collect
+            self._end_dump()
+
+    def _end_dump(self):
+        # None when there was no verbose dump: the names of the batch are unknown
+        if len(self._awaiting) >= self.max_awaiting:
+            self._awaiting.popleft()
+            self.dropped_uploads += 1
+        self._awaiting.append((self._batch_names, self._batch_ms))
+        self._stack = None
+        self._batch_names = None
+        self._batch_ms = None
+
+    def _resolve(self, names, upload_ms):
+        """Matches each uploaded name with the oldest pending event of the same name."""
+        resolved = []
+        for key in names:
+            queue = self._by_key.get(key)
+            if not queue or queue[0].time_ms > upload_ms:
+                continue
+            entry = queue.popleft()
+            if not queue:
+                del self._by_key[key]
+            entry.done = True
+            resolved.append(Dispatch(entry.token, entry.event, upload_ms - entry.time_ms))
+        self._compact()
+        return resolved
+
+    def _resolve_all(self, start_ms, upload_ms):
+        """A batch that was not dumped carries every event logged before its upload."""
+        resolved = []
+        for key in list(self._by_key):
+            queue = self._by_key[key]
+            while queue and queue[0].time_ms <= start_ms:
+                entry = queue.popleft()
+                entry.done = True
+                resolved.append(Dispatch(entry.token, entry.event, upload_ms - entry.time_ms))
+            if not queue:
+                del self._by_key[key]
+        self._compact()
+        return resolved
+
+    def _expire(self, now_ms):
+        """Gives up the oldest pending events when too old or too many."""
+        expired = []
+        while self._pending:
+            entry_id, entry = next(iter(self._pending.items()))
+            if not entry.done and entry.time_ms >= now_ms - self.max_age_ms \
+                    and len(self._pending) <= self.max_pending:
+                break
+            del self._pending[entry_id]
+            if not entry.done:
+                entry.done = True
+                expired.append(Dispatch(entry.token, entry.event, None))
+                queue = self._by_key[entry.key]
+                if queue and queue[0] is entry:
+                    queue.popleft()
+                if not queue:
+                    del self._by_key[entry.key]
+        return expired
+
+    def _compact(self):
+        """Drops the already resolved entries from the head of the pending list."""
+        while self._pending:
+            entry_id, entry = next(iter(self._pending.items()))
+            if not entry.done:
+                break
+            del self._pending[entry_id]
+
+    def pending(self):
+        """Returns the events still waiting for their upload."""
+        return [entry.event for entry in self._pending.values() if not entry.done]
+
+    def clear(self):
+        self._pending.clear()
+        self._by_key.clear()
+        self._stack = None
+        self._batch_names = None
+        self._batch_ms = None
+        self._awaiting.clear()
+        self.dropped_uploads = 0
+
+
+def correlate_lines(lines):
+    """
+    Runs the correlation over recorded logcat lines (e.g. a fixture file).
+    Returns (dispatches, events never uploaded).
+    """
+    clock = LogClock()
+    correlator = UploadCorrelator(clock)
+    dispatches = []
+    for line in lines:
+        line = line.rstrip("\n")
+        if classify_line(line) == LINE_EVENT:
+            ev = parse_logging_event_line(line, clock)
+            if ev:
+                dispatches += correlator.track(ev)
+        elif "FA-SVC" in line:
+            dispatches += correlator.feed(line)
+    never_uploaded = [d.event for d in dispatches if d.latency_ms is None]
+    never_uploaded += correlator.pending()
+    return [d for d in dispatches if d.latency_ms is not None], never_uploaded
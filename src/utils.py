@@ -6,6 +6,7 @@
 
 import sys
 import os
+import time
 
 
 def resource_path(relative_path):
@@ -13,3 +14,21 @@ def resource_path(relative_path):
     if hasattr(sys, "_MEIPASS"):
         return os.path.join(sys._MEIPASS, relative_path)
     return os.path.join(os.path.abspath("."), relative_path)
+
+
+class StartupTimer:
+    """Measures the startup phases (imports, UI, first paint...) in milliseconds."""
+
+    def __init__(self, start):
+        self.start = self.last = start
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self.last) * 1000))
+        self.last = now
+
+    def report(self):
+        parts = [f"{phase} {ms:.0f} ms" for phase, ms in self.phases]
+        total = (self.last - self.start) * 1000
+        return f"Startup {total:.0f} ms: " + ", ".join(parts)
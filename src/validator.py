@@ -0,0 +1,159 @@
+# Android GA Tracking Debugger
+# Copyright (c) 2025 Alejandro Reinoso
+#
+# This software is licensed under the Custom Shared-Profit License (CSPL) v1.0.
+# See the LICENSE.txt file for details.
+
+'''
+validator.py checks every captured event against the GA4 limits and the
+tracking plan defined in 'validation_rules.json'
+'''
+
+import os
+import re
+import json
+from collections import namedtuple, Counter
+from src.utils import resource_path
+from src.log_parser import strip_alias
+
+RULES_FILE = resource_path("validation_rules.json")
+
+# GA4 collection limits, can be overridden from the "limits" key of the rules.
+DEFAULT_LIMITS = {
+    "event_name_length": 40,
+    "param_name_length": 40,
+    "param_value_length": 100,
+    "param_count": 25,
+}
+
+EVENT_NAME_PATTERN = re.compile(r"^[A-Za-z][A-Za-z0-9_]*$")
+
+# 'rule' is the suffix of the i18n key ("validation.<rule>"), 'args' its format values.
+Violation = namedtuple("Violation", ("rule", "args"))
+
+
+def load_validation_rules():
+    """Reads the 'validation_rules.json' file. Returns empty dict if missing or corrupted."""
+    if not os.path.exists(RULES_FILE):
+        return {}
+    try:
+        with open(RULES_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+# --- Parameter checks --- #
+# Each check receives the params dict with the aliases stripped from the keys
+# and yields the violations found.
+
+def _param_limits_check(limits, ignored_prefixes):
+    name_limit = limits["param_name_length"]
+    value_limit = limits["param_value_length"]
+    count_limit = limits["param_count"]
+
+    def check(params):
+        count = 0
+        for k, v in params.items():
+            if k.startswith(ignored_prefixes):
+                continue
+            count += 1
+            if len(k) > name_limit:
+                yield Violation("param_name_too_long", {"param": k, "limit": name_limit})
+            if len(v) > value_limit:
+                yield Violation("param_value_too_long", {"param": k, "limit": value_limit})
+        if count > count_limit:
+            yield Violation("too_many_params", {"count": count, "limit": count_limit})
+    return check
+
+
+def _required_check(required):
+    required = tuple(required)
+
+    def check(params):
+        for k in required:
+            if k not in params:
+                yield Violation("missing_required", {"param": k})
+    return check
+
+
+def _enum_check(param, allowed):
+    allowed = frozenset(allowed)
+
+    def check(params):
+        value = params.get(param)
+        if value is not None and value not in allowed:
+            yield Violation("invalid_value", {"param": param, "value": value})
+    return check
+
+
+def _event_plan_checks(plan):
+    checks = []
+    if plan.get("required"):
+        checks.append(_required_check(plan["required"]))
+    for param, allowed in plan.get("enums", {}).items():
+        checks.append(_enum_check(param, allowed))
+    return checks
+
+
+class Validator:
+    def __init__(self, rules):
+        limits = dict(DEFAULT_LIMITS)
+        limits.update(rules.get("limits", {}))
+        self.limits = limits
+        self.reserved_names = frozenset(rules.get("reserved_event_names", []))
+        self.reserved_prefixes = tuple(rules.get("reserved_prefixes", []))
+        ignored_prefixes = tuple(rules.get("ignored_param_prefixes", []))
+
+        # Checks shared by every event ("*") and checks of the tracking plan by event name
+        plans = rules.get("events", {})
+        self._common_checks = [_param_limits_check(limits, ignored_prefixes)]
+        self._common_checks += _event_plan_checks(plans.get("*", {}))
+        self._plan_checks = {name: _event_plan_checks(plan)
+                             for name, plan in plans.items() if name != "*"}
+
+        # (event name, origin) => (name violations, param checks), filled on first sight
+        self._dispatch = {}
+        self.counts = Counter()
+
+    def _compile(self, name, origin):
+        """Builds the dispatch entry of an event name."""
+        name_violations = []
+        # Events logged by the SDK itself (origin=auto) may use reserved names
+        if origin != "auto":
+            if name in self.reserved_names:
+                name_violations.append(Violation("reserved_name", {"name": name}))
+            elif name.startswith(self.reserved_prefixes):
+                name_violations.append(Violation("reserved_prefix", {"name": name}))
+            if not EVENT_NAME_PATTERN.match(name):
+                name_violations.append(Violation("invalid_name", {"name": name}))
+            if len(name) > self.limits["event_name_length"]:
+                name_violations.append(Violation(
+                    "name_too_long", {"limit": self.limits["event_name_length"]}))
+
+        checks = tuple(self._common_checks + self._plan_checks.get(name, []))
+        entry = (tuple(name_violations), checks)
+        self._dispatch[(name, origin)] = entry
+        return entry
+
+    def check(self, ev):
+        """Returns the list of violations of a parsed event and counts them."""
+        name = strip_alias(ev["name"])
+        origin = ev.get("origin")
+        entry = self._dispatch.get((name, origin))
+        if entry is None:
+            entry = self._compile(name, origin)
+        name_violations, checks = entry
+
+        params = {strip_alias(k): v for k, v in ev["params"].items()}
+        violations = list(name_violations)
+        for check in checks:
+            violations.extend(check(params))
+
+        for violation in violations:
+            self.counts[violation.rule] += 1
+        return violations
+
+    def reset(self):
+        """Forgets the session counts."""
+        self.counts.clear()
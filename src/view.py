@@ -4,15 +4,42 @@
 # This software is licensed under the Custom Shared-Profit License (CSPL) v1.0.
 # See the LICENSE.txt file for details.
 
+import re
 import tkinter as tk
+from array import array
 from tkinter import scrolledtext, ttk, Menu
-import webbrowser
+from tkinter import font as tkfont
 from src.i18n import _
+from src.timestamps import format_timestamp
+from src.consent_engine import CONSENT_FIELDS
+from src.log_parser import (LOGCAT_LINE, classify_line, LINE_OTHER, LINE_EVENT,
+                            LINE_USER_PROPERTY, LINE_CONSENT)
+
+# Console lines highlighted above and below the visible ones
+HIGHLIGHT_MARGIN = 20
+LEVEL_COLORS = {"V": "gray", "D": "#00589b", "I": "#007a00", "W": "#b06000",
+                "E": "#b00000", "F": "#b00000", "A": "#b00000"}
+HIGHLIGHT_TAGS = tuple("hl_level_" + level for level in LEVEL_COLORS) + (
+    "hl_tag", "hl_event", "hl_event_name", "hl_user_property", "hl_consent")
+EVENT_NAME = re.compile(r"name=([^,]+)")
+
+
+def open_url(url):
+    # Imported on first use, it is not needed to show the window
+    import webbrowser
+    webbrowser.open(url)
 
 
 class View:
     def __init__(self, root, controller):
+        self.root = root
         self.controller = controller
+        self.stats_window = None
+        self.watches_window = None
+        self.diff_window = None
+        self.log_file = None
+        self.virtual_top = 0
+        self.event_times = {}  # events tree item => timestamp key
 
         main_paned = tk.PanedWindow(
             root, orient=tk.VERTICAL, sashwidth=8, sashrelief="raised")
@@ -30,15 +57,37 @@ class View:
 
         self.helpmenu = Menu(self.menubar, tearoff=0)
         self.helpmenu.add_command(label=_("menu.support"),
-                                  command=lambda: webbrowser.open("https://alejandroreinoso.com/contacto/?utm_source=ga_android_debugger&utm_medium=ga_android_debugger&utm_term=support"))
+                                  command=lambda: open_url("https://alejandroreinoso.com/contacto/?utm_source=ga_android_debugger&utm_medium=ga_android_debugger&utm_term=support"))
         self.helpmenu.add_command(label=_("menu.feedback"),
-                                  command=lambda: webbrowser.open("https://alejandroreinoso.com/contacto/?utm_source=ga_android_debugger&utm_medium=ga_android_debugger&utm_term=feedback"))
+                                  command=lambda: open_url("https://alejandroreinoso.com/contacto/?utm_source=ga_android_debugger&utm_medium=ga_android_debugger&utm_term=feedback"))
         self.helpmenu.add_separator()
         self.helpmenu.add_command(label=_("menu.about_me"),
-                                  command=lambda: webbrowser.open("https://www.linkedin.com/in/alejandroreinosogomez/"))
+                                  command=lambda: open_url("https://www.linkedin.com/in/alejandroreinosogomez/"))
+
+        self.toolsmenu = Menu(self.menubar, tearoff=0)
+        self.toolsmenu.add_command(label=_("menu.statistics"),
+                                   command=self.controller.open_stats_window)
+        self.toolsmenu.add_command(label=_("menu.watches"),
+                                   command=self.controller.open_watches_window)
+        self.toolsmenu.add_separator()
+        self.toolsmenu.add_command(label=_("menu.export_session"),
+                                   command=self.controller.export_session)
+        self.toolsmenu.add_command(label=_("menu.export_log_file"),
+                                   command=self.controller.export_log_file)
+        self.toolsmenu.add_command(label=_("menu.compare_sessions"),
+                                   command=self.controller.compare_sessions)
+        self.toolsmenu.add_separator()
+        self.stream_var = tk.BooleanVar(value=False)
+        self.toolsmenu.add_checkbutton(label=_("menu.stream_server"),
+                                       variable=self.stream_var,
+                                       command=self.controller.on_stream_toggle)
 
         self.menubar.add_cascade(label=_("menu.languages"), menu=self.filemenu)
+        self.languages_menu_index = self.menubar.index(tk.END)
+        self.menubar.add_cascade(label=_("menu.tools"), menu=self.toolsmenu)
+        self.tools_menu_index = self.menubar.index(tk.END)
         self.menubar.add_cascade(label=_("menu.help"), menu=self.helpmenu)
+        self.help_menu_index = self.menubar.index(tk.END)
 
         # LEFT FRAME: for “Start Log”, “Stop Log”, “Clear All”
         top_frame = tk.Frame(main_paned, bd=2, relief="groove")
@@ -58,6 +107,24 @@ class View:
             "menu.clear_all"), command=self.controller.clear_all)
         self.clear_button.pack(side=tk.LEFT, padx=5)
 
+        self.open_file_button = tk.Button(buttons_frame, text=_(
+            "menu.open_log_file"), command=self.controller.open_log_file)
+        self.open_file_button.pack(side=tk.LEFT, padx=5)
+
+        dedupe_frame = tk.Frame(top_frame)
+        dedupe_frame.pack(side=tk.LEFT, padx=10, pady=10)
+
+        self.dedupe_var = tk.BooleanVar(value=True)
+        self.dedupe_check = tk.Checkbutton(
+            dedupe_frame, text=_("dedupe.toggle"), variable=self.dedupe_var,
+            command=self.controller.on_dedupe_toggle)
+        self.dedupe_check.pack(side=tk.LEFT)
+        self.duplicates_label = tk.Label(dedupe_frame, text="")
+        self.duplicates_label.pack(side=tk.LEFT, padx=5)
+
+        self.status_label = tk.Label(top_frame, text="", fg="gray")
+        self.status_label.pack(side=tk.RIGHT, padx=10)
+
         # --- INTERMEDIATE FRAME -> subdiv (izq, der) ---
         middle_frame = tk.Frame(main_paned, bd=2, relief="groove")
         main_paned.add(middle_frame, minsize=150)
@@ -88,8 +155,7 @@ class View:
         consent_scrollbar = ttk.Scrollbar(consent_container, orient=tk.VERTICAL)
         self.consent_tree = ttk.Treeview(
             consent_container,
-            columns=("datetime", "ad_storage", "analytics_storage",
-                     "ad_user_data", "ad_personalization"),
+            columns=("datetime",) + CONSENT_FIELDS,
             show="headings",
             yscrollcommand=consent_scrollbar.set
         )
@@ -97,27 +163,27 @@ class View:
         consent_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.consent_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
-        self.consent_tree.heading("datetime", text="DateTime")
-        self.consent_tree.heading("ad_storage", text="ad_storage")
-        self.consent_tree.heading(
-            "analytics_storage", text="analytics_storage")
-        self.consent_tree.heading("ad_user_data", text="ad_user_data")
-        self.consent_tree.heading(
-            "ad_personalization", text="ad_personalization")
+        self.refresh_consent_headings()
+
+        self.consent_tree.tag_configure("watch_hit", background="#fff3b0")
 
+        # One column per field of the consent rules, sized to its name
         self.consent_tree.column("datetime", width=130)
-        self.consent_tree.column("ad_storage", width=90)
-        self.consent_tree.column("analytics_storage", width=120)
-        self.consent_tree.column("ad_user_data", width=120)
-        self.consent_tree.column("ad_personalization", width=130)
+        for field in CONSENT_FIELDS:
+            self.consent_tree.column(field, width=max(90, 7 * len(field)))
 
         right_frame = tk.Frame(middle_frame, bg="white")
         right_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
         # Events Tree
+        events_header = tk.Frame(right_frame, bg="white")
+        events_header.pack(fill=tk.X)
         self.events_title = tk.Label(
-            right_frame, text=_("events.title"), bg="white")
-        self.events_title.pack(anchor="w")
+            events_header, text=_("events.title"), bg="white")
+        self.events_title.pack(side=tk.LEFT)
+        self.violations_label = tk.Label(
+            events_header, text="", bg="white", fg="red")
+        self.violations_label.pack(side=tk.RIGHT, padx=5)
 
         events_container = tk.Frame(right_frame)
         events_container.pack(fill=tk.BOTH, expand=True)
@@ -129,6 +195,13 @@ class View:
         events_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
         self.events_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.events_tree.tag_configure("analytics_denied", foreground="red")
+        self.events_tree.tag_configure("violation", foreground="#b00000")
+        self.events_tree.tag_configure("invalid", background="#ffe5e5")
+        self.events_tree.tag_configure("not_uploaded", foreground="gray")
+        self.events_tree.tag_configure("watch_hit", background="#fff3b0")
+        self.events_tree.tag_configure("dispatch", foreground="#00589b")
+        self.events_tree.bind("<<TreeviewSelect>>", self._on_event_select)
 
         # --- LOWER FRAME -> console + search
         bottom_frame = tk.Frame(main_paned, bd=2, relief="sunken")
@@ -147,22 +220,22 @@ class View:
         self.search_button.pack(side=tk.LEFT, padx=5)
 
         self.first_button = tk.Button(
-            frame_search, text="|<<", command=self.controller.jump_to_first)
+            frame_search, text=_("search.first"), command=self.controller.jump_to_first)
         self.first_button.pack(side=tk.LEFT, padx=2)
 
         self.prev_button = tk.Button(
-            frame_search, text="<<", command=self.controller.prev_match)
+            frame_search, text=_("search.previous"), command=self.controller.prev_match)
         self.prev_button.pack(side=tk.LEFT, padx=2)
 
         self.match_label = tk.Label(frame_search, text="0 / 0")
         self.match_label.pack(side=tk.LEFT, padx=10)
 
         self.next_button = tk.Button(
-            frame_search, text=">>", command=self.controller.next_match)
+            frame_search, text=_("search.next"), command=self.controller.next_match)
         self.next_button.pack(side=tk.LEFT, padx=2)
 
         self.last_button = tk.Button(
-            frame_search, text=">>|", command=self.controller.jump_to_last)
+            frame_search, text=_("search.last"), command=self.controller.jump_to_last)
         self.last_button.pack(side=tk.LEFT, padx=2)
 
         self.search_goto_label = tk.Label(
@@ -178,50 +251,177 @@ class View:
             bottom_frame, width=100, height=10)
         self.text_area.pack(padx=5, pady=5, fill=tk.BOTH, expand=True)
 
-    def update_console(self, text):
+        # Highlighting: kind of each console line (see classify_line), only
+        # the lines around the viewport are tagged
+        self.console_kinds = array("b")
+        self._highlight_pending = False
+        for level, color in LEVEL_COLORS.items():
+            self.text_area.tag_configure("hl_level_" + level, foreground=color)
+        bold = tkfont.Font(font=self.text_area.cget("font"))
+        bold.configure(weight="bold")
+        self.text_area.tag_configure("hl_tag", foreground="#6f42c1")
+        self.text_area.tag_configure("hl_event", background="#e8f1ff")
+        self.text_area.tag_configure("hl_event_name", foreground="#00589b", font=bold)
+        self.text_area.tag_configure("hl_user_property", background="#eef7ee")
+        self.text_area.tag_configure("hl_consent", background="#fff3d6")
+        self.text_area.config(yscrollcommand=self._on_console_yview)
+
+    def update_console(self, text, kind=LINE_OTHER):
         '''
-        Insert text in the console
+        Insert text in the console. 'kind' is the classify_line() kind of its last line
         '''
+        lines = text.count("\n")
+        if lines:
+            self.console_kinds.extend([LINE_OTHER] * (lines - 1))
+            self.console_kinds.append(kind)
         self.text_area.insert(tk.END, text)
         self.text_area.see(tk.END)  # automatic scroll
 
+    # -----------------------------------------------------
+    # Console Highlighting
+    # -----------------------------------------------------
+
+    def _on_console_yview(self, first, last):
+        self.text_area.vbar.set(first, last)
+        if not self._highlight_pending:
+            # Once per batch of inserted lines or scroll steps
+            self._highlight_pending = True
+            self.text_area.after_idle(self.highlight_console)
+
+    def highlight_console(self):
+        """Highlights the lines around the viewport of the live console."""
+        self._highlight_pending = False
+        if self.log_file is not None:
+            return
+        height = self.text_area.winfo_height()
+        first = int(self.text_area.index("@0,0").split(".")[0])
+        last = int(self.text_area.index(f"@0,{height}").split(".")[0])
+        first = max(1, first - HIGHLIGHT_MARGIN)
+        last = min(len(self.console_kinds), last + HIGHLIGHT_MARGIN)
+        if last < first:
+            return
+        lines = self.text_area.get(f"{first}.0", f"{last}.end").split("\n")
+        self._highlight_lines(first, lines, self.console_kinds[first - 1:last])
+
+    def _highlight_lines(self, first, lines, kinds):
+        """Tags 'lines' (starting at text line 'first') by level, tag and kind."""
+        text = self.text_area
+        for tag in HIGHLIGHT_TAGS:
+            text.tag_remove(tag, "1.0", tk.END)
+        for n, (line, kind) in enumerate(zip(lines, kinds), first):
+            m = LOGCAT_LINE.match(line)
+            if m:
+                level_group, tag_group = (1, 2) if m.group(1) else (3, 4)
+                start, end = m.span(level_group)
+                text.tag_add("hl_level_" + m.group(level_group), f"{n}.{start}", f"{n}.{end}")
+                start, end = m.span(tag_group)
+                text.tag_add("hl_tag", f"{n}.{start}", f"{n}.{end}")
+            if kind == LINE_EVENT:
+                text.tag_add("hl_event", f"{n}.0", f"{n}.end")
+                name = EVENT_NAME.search(line)
+                if name:
+                    start, end = name.span(1)
+                    text.tag_add("hl_event_name", f"{n}.{start}", f"{n}.{end}")
+            elif kind == LINE_USER_PROPERTY:
+                text.tag_add("hl_user_property", f"{n}.0", f"{n}.end")
+            elif kind == LINE_CONSENT:
+                text.tag_add("hl_consent", f"{n}.0", f"{n}.end")
+
     # -----------------------------------------------------
     # Insert Data Into UI Treeviews
     # -----------------------------------------------------
 
     def insert_event_in_tree(self, ev):
         """Inserts an event into the events tree view in the UI."""
-        dt = ev["datetime"]
+        dt = format_timestamp(ev["ts"])
         name = ev["name"]
         params = ev["params"]
 
-        parent_id = self.events_tree.insert("", tk.END, text=f"{dt} - {name}")
+        # Flag events sent while analytics_storage was denied
+        tags = ()
+        consent = ev.get("consent")
+        if consent is not None and consent.analytics_storage == "denied":
+            tags += ("analytics_denied",)
+        violations = ev.get("violations")
+        if violations:
+            tags += ("invalid",)
+
+        parent_id = self.events_tree.insert(
+            "", tk.END, text=f"{dt} - {name}", tags=tags)
+        for violation in violations or ():
+            self.events_tree.insert(
+                parent_id, tk.END, tags=("violation",),
+                text="\u26a0 " + _("validation." + violation.rule).format(**violation.args))
         for k, v in params.items():
             self.events_tree.insert(parent_id, tk.END, text=f"{k} = {v}")
 
         self.events_tree.see(parent_id)
+        self.event_times[parent_id] = ev["ts"]
+        return parent_id
+
+    def _on_event_select(self, _event):
+        selection = self.events_tree.selection()
+        if not selection:
+            return
+        item = self.events_tree.parent(selection[0]) or selection[0]
+        ts = self.event_times.get(item)
+        if ts is not None:
+            self.controller.on_event_select(ts)
+
+    def select_consent(self, item_id):
+        """Selects the consent row in force for the selected event (none if None)."""
+        if item_id is None or not self.consent_tree.exists(item_id):
+            self.consent_tree.selection_set(())
+            return
+        self.consent_tree.selection_set(item_id)
+        self.consent_tree.see(item_id)
+
+    def mark_event_dispatch(self, item_id, latency_ms):
+        """Shows the upload latency of an event, or flags it as never uploaded."""
+        if item_id is None or not self.events_tree.exists(item_id):
+            return
+        if latency_ms is None:
+            text = _("upload.never")
+            tags = tuple(self.events_tree.item(item_id, "tags") or ())
+            self.events_tree.item(item_id, tags=tags + ("not_uploaded",))
+        else:
+            text = _("upload.latency").format(latency=latency_ms)
+        self.events_tree.insert(item_id, 0, text="\u23f1 " + text, tags=("dispatch",))
+
+    def refresh_consent_headings(self):
+        """Headings of the consent tree in the current language ('consent.<field>' keys)."""
+        self.consent_tree.heading("datetime", text=_("consent.datetime"))
+        for field in CONSENT_FIELDS:
+            text = _("consent." + field)
+            # A new field without translation shows its own name
+            self.consent_tree.heading(field, text=field if text == "consent." + field else text)
 
     def insert_consent_in_tree(self, cdict, consent_entries_from_model):
         """
-        cdict => {datetime, ad_storage, analytics_storage, ad_user_data, ad_personalization}
-        If there is already a row with the same datetime => we delete it and reinsert it
+        cdict => {ts, <each field of CONSENT_FIELDS>}
+        If there is already a row with the same timestamp key => we delete it and reinsert it
         """
-        dt = cdict["datetime"]
-        values = (
-            dt,
-            cdict.get("ad_storage", ""),
-            cdict.get("analytics_storage", ""),
-            cdict.get("ad_user_data", ""),
-            cdict.get("ad_personalization", "")
-        )
-        if dt in consent_entries_from_model:
-            self.consent_tree.delete(consent_entries_from_model[dt])
+        ts = cdict["ts"]
+        values = (format_timestamp(ts),) + tuple(
+            cdict.get(field) or "" for field in CONSENT_FIELDS)
+        if ts in consent_entries_from_model:
+            self.consent_tree.delete(consent_entries_from_model[ts])
 
         new_item = self.consent_tree.insert("", tk.END, values=values)
         self.consent_tree.see(new_item)
 
         return new_item
 
+    def update_violations_label(self, total):
+        """Shows the number of validation violations of the session."""
+        text = _("validation.summary").format(total=total) if total else ""
+        self.violations_label.config(text=text)
+
+    def update_duplicates_label(self, total):
+        """Shows the number of duplicated events suppressed in the session."""
+        text = _("dedupe.suppressed").format(total=total) if total else ""
+        self.duplicates_label.config(text=text)
+
     def refresh_user_props_tree(self, user_properties_from_model):
         """Refreshes the user properties display in the UI."""
         for item in self.user_props_tree.get_children():
@@ -235,9 +435,356 @@ class View:
         if children:
             self.user_props_tree.see(children[-1])
 
+    def set_status(self, text):
+        """Shows a short status message (e.g. export progress) in the toolbar."""
+        self.status_label.config(text=text)
+
+    # -----------------------------------------------------
+    # Dialogs
+    # -----------------------------------------------------
+
+    def show_error(self, title, message):
+        from tkinter import messagebox
+        messagebox.showerror(title, message)
+
+    def ask_log_file(self):
+        """Asks for a saved logcat file. Returns its path or '' if cancelled."""
+        from tkinter import filedialog
+        return filedialog.askopenfilename(
+            title=_("dialog.open_log_file"),
+            filetypes=[(_("dialog.log_files"), "*.txt *.log *.zip"), (_("dialog.all_files"), "*.*")])
+
+    def ask_session_file(self, title):
+        """Asks for a session to compare. Returns its path or '' if cancelled."""
+        from tkinter import filedialog
+        return filedialog.askopenfilename(
+            title=title,
+            filetypes=[(_("dialog.session_files"), "*.txt *.log *.zip *.jsonl"),
+                       (_("dialog.all_files"), "*.*")])
+
+    def ask_json_path(self):
+        """Asks where to save a JSON report. Returns the path or '' if cancelled."""
+        from tkinter import filedialog
+        return filedialog.asksaveasfilename(
+            title=_("diff.save_json"), defaultextension=".json",
+            filetypes=[("JSON", "*.json")])
+
+    def ask_export_path(self):
+        """Asks where to export. Returns the path or '' if cancelled."""
+        from tkinter import filedialog
+        return filedialog.asksaveasfilename(
+            title=_("dialog.export"),
+            defaultextension=".jsonl",
+            filetypes=[("JSON Lines", "*.jsonl"), ("CSV", "*.csv"), ("Parquet", "*.parquet")])
+
+    # -----------------------------------------------------
+    # Log File Viewer
+    # -----------------------------------------------------
+
+    def attach_log_file(self, log_file):
+        """
+        Turns the console into a viewer of 'log_file': only the visible lines
+        are inserted in the text widget and the scrollbar maps to the whole file.
+        """
+        self.log_file = log_file
+        self.virtual_top = 0
+        self._linespace = tkfont.Font(font=self.text_area.cget("font")).metrics("linespace")
+        self.text_area.delete("1.0", tk.END)
+        del self.console_kinds[:]
+        self.text_area.config(yscrollcommand=lambda *args: None)
+        self.text_area.vbar.config(command=self._on_virtual_scroll)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.text_area.bind(sequence, self._on_virtual_wheel)
+        self.text_area.bind("<Configure>", lambda event: self.render_log_file())
+        self.render_log_file()
+
+    def detach_log_file(self):
+        """Back to the regular (live) console."""
+        if self.log_file is None:
+            return
+        self.log_file = None
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>", "<Configure>"):
+            self.text_area.unbind(sequence)
+        self.text_area.config(yscrollcommand=self._on_console_yview)
+        self.text_area.vbar.config(command=self.text_area.yview)
+        self.text_area.delete("1.0", tk.END)
+        del self.console_kinds[:]
+
+    def _visible_lines(self):
+        return max(1, self.text_area.winfo_height() // self._linespace)
+
+    def _scroll_log_file_to(self, top):
+        last_top = max(0, self.log_file.line_count - self._visible_lines())
+        self.virtual_top = max(0, min(top, last_top))
+        self.render_log_file()
+
+    def _on_virtual_scroll(self, *args):
+        """Scrollbar command in viewer mode ('moveto' fraction / 'scroll' n units|pages)."""
+        if args[0] == "moveto":
+            self._scroll_log_file_to(int(float(args[1]) * self.log_file.line_count))
+        elif args[0] == "scroll":
+            step = self._visible_lines() if args[2] == "pages" else 1
+            self._scroll_log_file_to(self.virtual_top + int(args[1]) * step)
+
+    def _on_virtual_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self._scroll_log_file_to(self.virtual_top - 3)
+        else:
+            self._scroll_log_file_to(self.virtual_top + 3)
+        return "break"
+
+    def render_log_file(self):
+        """Materializes only the visible region of the log file."""
+        if self.log_file is None:
+            return
+        visible = self._visible_lines()
+        lines = self.log_file.get_lines(self.virtual_top, visible)
+        self.text_area.delete("1.0", tk.END)
+        self.text_area.insert("1.0", "\n".join(lines))
+        # Only the visible lines are in the widget: classify them on the fly
+        self._highlight_lines(1, lines, [classify_line(line) for line in lines])
+        total = max(1, self.log_file.line_count)
+        self.text_area.vbar.set(self.virtual_top / total,
+                                (self.virtual_top + len(lines)) / total)
+
+    # -----------------------------------------------------
+    # Watch Expressions Window
+    # -----------------------------------------------------
+
+    def highlight_watch_hit(self, tree, item_id):
+        """Highlights the row of a record that matched a watch."""
+        if item_id is None or not tree.exists(item_id):
+            return
+        tags = tuple(tree.item(item_id, "tags") or ())
+        tree.item(item_id, tags=tags + ("watch_hit",))
+        tree.see(item_id)
+
+    def open_watches_window(self, watches, hits):
+        """Opens (or raises) the window to edit the watches and see their hits."""
+        if self.watches_window is not None:
+            self.watches_window.lift()
+            return
+
+        window = tk.Toplevel(self.root)
+        window.title(_("watches.title"))
+        self.watches_window = window
+
+        self.watches_tree = ttk.Treeview(
+            window, columns=("name", "expression", "sound"), show="headings", height=6)
+        self.watches_tree.heading("name", text=_("watches.name"))
+        self.watches_tree.heading("expression", text=_("watches.expression"))
+        self.watches_tree.heading("sound", text=_("watches.sound"))
+        self.watches_tree.column("name", width=150)
+        self.watches_tree.column("expression", width=400)
+        self.watches_tree.column("sound", width=60, anchor="center")
+        self.watches_tree.pack(fill=tk.X, padx=5, pady=5)
+
+        form = tk.Frame(window)
+        form.pack(fill=tk.X, padx=5)
+        tk.Label(form, text=_("watches.name")).pack(side=tk.LEFT)
+        name_entry = tk.Entry(form, width=15)
+        name_entry.pack(side=tk.LEFT, padx=5)
+        tk.Label(form, text=_("watches.expression")).pack(side=tk.LEFT)
+        expression_entry = tk.Entry(form, width=50)
+        expression_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+        sound_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(form, text=_("watches.sound"), variable=sound_var).pack(side=tk.LEFT)
+
+        def add():
+            if self.controller.add_watch(name_entry.get(), expression_entry.get(),
+                                         sound_var.get()):
+                name_entry.delete(0, tk.END)
+                expression_entry.delete(0, tk.END)
+
+        def remove():
+            selected = self.watches_tree.selection()
+            if selected:
+                self.controller.remove_watch(self.watches_tree.index(selected[0]))
+
+        tk.Button(form, text=_("watches.add"), command=add).pack(side=tk.LEFT, padx=5)
+        tk.Button(form, text=_("watches.remove"), command=remove).pack(side=tk.LEFT)
+
+        tk.Label(window, text=_("watches.hits")).pack(anchor="w", padx=5, pady=(10, 0))
+        hits_container = tk.Frame(window)
+        hits_container.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        hits_scrollbar = ttk.Scrollbar(hits_container, orient=tk.VERTICAL)
+        self.watch_hits_list = tk.Listbox(
+            hits_container, height=12, yscrollcommand=hits_scrollbar.set)
+        hits_scrollbar.config(command=self.watch_hits_list.yview)
+        hits_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.watch_hits_list.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        def close():
+            self.watches_window = None
+            window.destroy()
+
+        window.protocol("WM_DELETE_WINDOW", close)
+        self.refresh_watches_list(watches)
+        for hit in hits:
+            self.add_watch_hit(hit)
+
+    def refresh_watches_list(self, watches):
+        if self.watches_window is None:
+            return
+        self.watches_tree.delete(*self.watches_tree.get_children())
+        for watch in watches:
+            self.watches_tree.insert("", tk.END, values=(
+                watch.name, watch.expression, "\u2713" if watch.sound else ""))
+
+    def add_watch_hit(self, hit):
+        """Appends a hit (timestamp key, watch name, summary) to the log, if the window is open."""
+        if self.watches_window is None:
+            return
+        ts, name, summary = hit
+        self.watch_hits_list.insert(tk.END, f"{format_timestamp(ts)}  [{name}]  {summary}")
+        if self.watch_hits_list.size() > 1000:
+            self.watch_hits_list.delete(0)
+        self.watch_hits_list.see(tk.END)
+
+    # -----------------------------------------------------
+    # Session Diff Window
+    # -----------------------------------------------------
+
+    def open_diff_window(self, report, old_name, new_name, max_rows=5000):
+        """Shows the differences between two sessions (replacing the previous ones)."""
+        if self.diff_window is not None:
+            self.diff_window.destroy()
+        window = tk.Toplevel(self.root)
+        window.title(f'{_("diff.title")}: {old_name} \u2192 {new_name}')
+        self.diff_window = window
+
+        summary = report["summary"]
+        header = tk.Frame(window)
+        header.pack(fill=tk.X, padx=5, pady=5)
+        tk.Label(header, text=_("diff.summary").format(**summary)).pack(side=tk.LEFT)
+        tk.Button(header, text=_("diff.save_json"),
+                  command=lambda: self.controller.save_diff_report(report)).pack(side=tk.RIGHT)
+        if report["truncated"]:
+            tk.Label(window, text=_("diff.truncated"), fg="red").pack(anchor="w", padx=5)
+
+        paned = tk.PanedWindow(window, orient=tk.VERTICAL, sashwidth=6)
+        paned.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        events_tree = ttk.Treeview(paned, columns=("op", "old", "new"))
+        events_tree.heading("#0", text=_("diff.event"))
+        events_tree.heading("op", text=_("diff.op"))
+        events_tree.heading("old", text=_("diff.old_session"))
+        events_tree.heading("new", text=_("diff.new_session"))
+        events_tree.column("op", width=90)
+        events_tree.column("old", width=170)
+        events_tree.column("new", width=170)
+        events_tree.tag_configure("added", foreground="#007a00")
+        events_tree.tag_configure("removed", foreground="#b00000")
+        events_tree.tag_configure("changed", foreground="#b06000")
+        paned.add(events_tree, minsize=120)
+
+        # A Treeview with 100k rows is unusable, the JSON report has them all
+        for entry in report["events"][:max_rows]:
+            op = entry["op"]
+            item = events_tree.insert("", tk.END, text=entry["name"], tags=(op,), values=(
+                _("diff." + op), entry["old_datetime"] or "", entry["new_datetime"] or ""))
+            params = entry.get("params")
+            if params:
+                for k, v in params["added"].items():
+                    events_tree.insert(item, tk.END, text=f"+ {k} = {v}", tags=("added",))
+                for k, v in params["removed"].items():
+                    events_tree.insert(item, tk.END, text=f"- {k} = {v}", tags=("removed",))
+                for k, (old, new) in params["changed"].items():
+                    events_tree.insert(item, tk.END, text=f"~ {k}: {old} \u2192 {new}",
+                                       tags=("changed",))
+        if len(report["events"]) > max_rows:
+            events_tree.insert("", tk.END, text=_("diff.more").format(
+                count=len(report["events"]) - max_rows))
+
+        consent_tree = ttk.Treeview(
+            paned, columns=("op", "datetime") + CONSENT_FIELDS, show="headings", height=5)
+        consent_tree.heading("op", text=_("diff.op"))
+        consent_tree.heading("datetime", text=_("consent.datetime"))
+        consent_tree.column("op", width=90)
+        for field in CONSENT_FIELDS:
+            consent_tree.heading(field, text=_("consent." + field))
+            consent_tree.column(field, width=120)
+        consent_tree.tag_configure("added", foreground="#007a00")
+        consent_tree.tag_configure("removed", foreground="#b00000")
+        paned.add(consent_tree, minsize=80)
+        for entry in report["consent"][:max_rows]:
+            consent_tree.insert("", tk.END, tags=(entry["op"],), values=(
+                _("diff." + entry["op"]), entry["datetime"] or "",
+                *(entry[field] or "" for field in CONSENT_FIELDS)))
+
+        def close():
+            self.diff_window = None
+            window.destroy()
+
+        window.protocol("WM_DELETE_WINDOW", close)
+
+    # -----------------------------------------------------
+    # Statistics Window
+    # -----------------------------------------------------
+
+    def open_stats_window(self, stats, refresh_ms=1000):
+        """
+        Opens (or raises) the statistics window. Its content is refreshed
+        every 'refresh_ms' while it is open, regardless of the ingest volume.
+        """
+        if self.stats_window is not None:
+            self.stats_window.lift()
+            return
+
+        window = tk.Toplevel(self.root)
+        window.title(_("stats.title"))
+        self.stats_window = window
+
+        paned = tk.PanedWindow(window, orient=tk.VERTICAL, sashwidth=6)
+        paned.pack(fill=tk.BOTH, expand=True)
+
+        events_stats_tree = ttk.Treeview(
+            paned, columns=("event", "total", "per_minute"), show="headings")
+        events_stats_tree.heading("event", text=_("stats.event"))
+        events_stats_tree.heading("total", text=_("stats.total"))
+        events_stats_tree.heading("per_minute", text=_("stats.per_minute"))
+        events_stats_tree.column("total", width=80, anchor="e")
+        events_stats_tree.column("per_minute", width=100, anchor="e")
+        paned.add(events_stats_tree, minsize=80)
+
+        params_stats_tree = ttk.Treeview(
+            paned, columns=("param", "distinct"), show="headings")
+        params_stats_tree.heading("param", text=_("stats.param"))
+        params_stats_tree.heading("distinct", text=_("stats.distinct"))
+        params_stats_tree.column("distinct", width=120, anchor="e")
+        paned.add(params_stats_tree, minsize=80)
+
+        def fill(tree, rows):
+            items = tree.get_children()
+            for i, row in enumerate(rows):
+                if i < len(items):
+                    tree.item(items[i], values=row)
+                else:
+                    tree.insert("", tk.END, values=row)
+            if len(items) > len(rows):
+                tree.delete(*items[len(rows):])
+
+        def refresh():
+            if self.stats_window is not window:
+                return
+            fill(events_stats_tree, stats.event_rows())
+            fill(params_stats_tree, stats.param_rows())
+            window.after(refresh_ms, refresh)
+
+        def close():
+            self.stats_window = None
+            window.destroy()
+
+        window.protocol("WM_DELETE_WINDOW", close)
+        refresh()
+
     def clear_ui(self):
         """Clears all widgets that display session data."""
         self.text_area.delete("1.0", tk.END)
+        del self.console_kinds[:]
+        self.event_times.clear()
+        self.violations_label.config(text="")
+        self.duplicates_label.config(text="")
         for tree in [self.events_tree, self.user_props_tree, self.consent_tree]:
             for item in tree.get_children():
                 tree.delete(item)
@@ -0,0 +1,209 @@
+# Android GA Tracking Debugger
+# Copyright (c) 2025 Alejandro Reinoso
+#
+# This software is licensed under the Custom Shared-Profit License (CSPL) v1.0.
+# See the LICENSE.txt file for details.
+
+'''
+watches.py compiles the user-defined watch expressions into a single matcher.
+
+Expressions use Python syntax over these names:
+    type        "event", "consent" or "user_property"
+    event       event name without alias (None if not an event)
+    consent     consent in force (consent.analytics_storage, ...)
+    previous    consent before a consent change (the same as 'consent'
+                for events and user properties)
+    prop, prop_value    user property name and value
+and these functions:
+    has("key")      the event has the parameter
+    param("key")    value of the parameter (None if missing)
+    num(x)          x as a number (NaN if it is not one, so comparisons are False)
+    changed("field")    the consent field has just changed
+
+e.g.  event == "purchase" and not has("transaction_id")
+      type == "consent" and changed("analytics_storage") and consent.analytics_storage == "denied"
+      num(param("value")) > 100
+'''
+
+import ast
+import sys
+from collections import namedtuple
+from src.consent_timeline import ConsentSnapshot, EMPTY_CONSENT
+from src.log_parser import strip_alias
+
+Watch = namedtuple("Watch", ("name", "expression", "sound"))
+
+ARGUMENTS = ("type", "event", "params", "consent", "previous", "prop", "prop_value")
+NAMES = frozenset(ARGUMENTS) - {"params"}
+CONSENT_NAMES = frozenset(("consent", "previous"))
+FUNCTIONS = frozenset(("has", "param", "num", "changed"))
+
+# Python 3.7 parses literals as Str / Num / NameConstant
+LITERAL_NODES = (ast.Constant,) if sys.version_info >= (3, 8) else \
+    (ast.Constant, ast.Str, ast.Num, ast.NameConstant)
+
+ALLOWED_NODES = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+    ast.In, ast.NotIn, ast.Is, ast.IsNot, ast.Name, ast.Load,
+    ast.Attribute, ast.Call, ast.Tuple, ast.List,
+) + LITERAL_NODES
+
+
+class WatchError(Exception):
+    pass
+
+
+def _num(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _changed(consent, previous, field):
+    return getattr(consent, field) != getattr(previous, field)
+
+
+class _Validator(ast.NodeVisitor):
+    def generic_visit(self, node):
+        if not isinstance(node, ALLOWED_NODES):
+            raise WatchError(f"'{type(node).__name__}' is not allowed")
+        super().generic_visit(node)
+
+    def visit_Name(self, node):
+        if node.id not in NAMES:
+            raise WatchError(f"Unknown name '{node.id}'")
+
+    def visit_Attribute(self, node):
+        if not (isinstance(node.value, ast.Name) and node.value.id in CONSENT_NAMES):
+            raise WatchError("Attributes are only allowed on 'consent' and 'previous'")
+        if node.attr not in ConsentSnapshot._fields:
+            raise WatchError(f"Unknown consent field '{node.attr}'")
+
+    def visit_Call(self, node):
+        if not (isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS):
+            raise WatchError("Only has(), param(), num() and changed() can be called")
+        if node.keywords or len(node.args) != 1:
+            raise WatchError(f"{node.func.id}() takes one argument")
+        if node.func.id == "changed":
+            try:
+                field = ast.literal_eval(node.args[0])
+            except ValueError:
+                field = None
+            if field not in ConsentSnapshot._fields:
+                raise WatchError("changed() takes the name of a consent field")
+        for arg in node.args:
+            self.visit(arg)
+
+
+class _Rewriter(ast.NodeTransformer):
+    """Turns the helper calls into plain expressions over the matcher arguments."""
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        name = node.func.id
+        arg = node.args[0]
+        if name == "has":
+            return ast.Compare(left=arg, ops=[ast.In()],
+                               comparators=[ast.Name(id="params", ctx=ast.Load())])
+        if name == "param":
+            return ast.Call(func=ast.Attribute(value=ast.Name(id="params", ctx=ast.Load()),
+                                               attr="get", ctx=ast.Load()),
+                            args=[arg], keywords=[])
+        if name == "num":
+            return ast.Call(func=ast.Name(id="_num", ctx=ast.Load()), args=[arg], keywords=[])
+        return ast.Call(func=ast.Name(id="_changed", ctx=ast.Load()),
+                        args=[ast.Name(id="consent", ctx=ast.Load()),
+                              ast.Name(id="previous", ctx=ast.Load()), arg],
+                        keywords=[])
+
+
+def parse_expression(expression):
+    """Validates a watch expression. Returns its AST or raises WatchError."""
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise WatchError(f"Syntax error: {e.msg}")
+    _Validator().visit(tree)
+    return _Rewriter().visit(tree).body
+
+
+class _Splicer(ast.NodeTransformer):
+    """Replaces the '_W<i>' placeholders of the template with the expressions."""
+
+    def __init__(self, bodies):
+        self.bodies = bodies
+
+    def visit_Name(self, node):
+        if node.id.startswith("_W") and node.id[2:].isdigit():
+            return self.bodies[int(node.id[2:])]
+        return node
+
+
+class WatchMatcher:
+    def __init__(self, watches):
+        self.watches = list(watches)
+        bodies = [parse_expression(w.expression) for w in self.watches]
+
+        # One function evaluating every expression, a failing one never stops the rest
+        lines = [f"def _match({', '.join(ARGUMENTS)}):", "    hits = []"]
+        for i in range(len(bodies)):
+            lines += ["    try:",
+                      f"        if _W{i}:",
+                      f"            hits.append({i})",
+                      "    except Exception:",
+                      "        pass"]
+        lines.append("    return hits")
+        module = _Splicer(bodies).visit(ast.parse("\n".join(lines)))
+        ast.fix_missing_locations(module)
+
+        namespace = {"_num": _num, "_changed": _changed,
+                     "__builtins__": {"Exception": Exception}}
+        exec(compile(module, "<watches>", "exec"), namespace)
+        self._match = namespace["_match"]
+
+    def __bool__(self):
+        return bool(self.watches)
+
+    def _hits(self, indexes):
+        return [self.watches[i] for i in indexes]
+
+    def match_event(self, ev):
+        if not self.watches:
+            return []
+        params = {strip_alias(k): v for k, v in ev["params"].items()}
+        # previous = consent: changed() is only true on the consent change itself
+        consent = ev.get("consent") or EMPTY_CONSENT
+        return self._hits(self._match("event", strip_alias(ev["name"]), params,
+                                      consent, consent, None, None))
+
+    def match_consent(self, consent, previous):
+        if not self.watches:
+            return []
+        return self._hits(self._match("consent", None, {}, consent,
+                                      previous or EMPTY_CONSENT, None, None))
+
+    def match_user_property(self, up, consent):
+        if not self.watches:
+            return []
+        consent = consent or EMPTY_CONSENT
+        return self._hits(self._match("user_property", None, {}, consent,
+                                      consent, up["name"], up["value"]))
+
+
+def load_watches(config_data):
+    """Watches stored in config ('watches' key). Invalid ones are skipped."""
+    watches = []
+    for item in config_data.get("watches", []):
+        try:
+            watch = Watch(str(item["name"]), str(item["expression"]), bool(item.get("sound")))
+            parse_expression(watch.expression)
+        except (KeyError, TypeError, WatchError):
+            continue
+        watches.append(watch)
+    return watches
+
+
+def save_watches(config_data, watches):
+    config_data["watches"] = [w._asdict() for w in watches]
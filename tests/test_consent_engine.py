@@ -0,0 +1,85 @@
+# Android GA Tracking Debugger
+# Copyright (c) 2025 Alejandro Reinoso
+#
+# This software is licensed under the Custom Shared-Profit License (CSPL) v1.0.
+# See the LICENSE.txt file for details.
+
+from src.consent_engine import ConsentEngine, CONSENT_FIELDS
+
+
+def apply(engine, **fields):
+    consent = dict(dict.fromkeys(CONSENT_FIELDS), ts=0, **fields)
+    changed = engine.apply(consent)
+    return changed, {field: consent[field] for field in CONSENT_FIELDS}
+
+
+def test_fields():
+    assert CONSENT_FIELDS == ("ad_storage", "analytics_storage",
+                              "ad_user_data", "ad_personalization")
+
+
+def test_explicit_values_are_kept():
+    engine = ConsentEngine()
+    changed, state = apply(engine, ad_storage="granted", analytics_storage="denied",
+                           ad_user_data="denied")
+    assert changed
+    assert state == {"ad_storage": "granted", "analytics_storage": "denied",
+                     "ad_user_data": "denied", "ad_personalization": "granted"}
+
+
+def test_logged_ad_personalization_is_ignored():
+    # Only the non_personalized_ads user property sets it
+    engine = ConsentEngine()
+    _changed, state = apply(engine, ad_storage="denied", ad_personalization="granted")
+    assert state["ad_personalization"] == "denied"
+
+
+def test_missing_fields_fall_back_on_ad_storage():
+    engine = ConsentEngine()
+    _changed, state = apply(engine, ad_storage="denied", analytics_storage="granted")
+    assert state["ad_user_data"] == "denied"
+    assert state["ad_personalization"] == "denied"
+
+
+def test_partial_update_keeps_the_previous_values():
+    engine = ConsentEngine()
+    apply(engine, ad_storage="granted", analytics_storage="granted", ad_user_data="denied")
+    changed, state = apply(engine, analytics_storage="denied")
+    assert changed
+    assert state == {"ad_storage": "granted", "analytics_storage": "denied",
+                     "ad_user_data": "denied", "ad_personalization": "granted"}
+
+    # A later ad_storage change does not override the known values
+    _changed, state = apply(engine, ad_storage="denied")
+    assert state["ad_user_data"] == "denied"
+    assert state["ad_personalization"] == "granted"
+
+
+def test_same_state_is_not_a_change():
+    engine = ConsentEngine()
+    assert apply(engine, ad_storage="granted")[0]
+    assert not apply(engine, ad_storage="granted")[0]
+    assert not apply(engine)[0]
+
+
+def test_npa_user_property_decides_ad_personalization():
+    engine = ConsentEngine()
+    assert not engine.set_user_property("some_property", "1")
+    assert engine.set_user_property("non_personalized_ads(_npa)", " 1 ")
+    _changed, state = apply(engine, ad_storage="granted", ad_personalization="granted")
+    # The user property has priority over the logged value
+    assert state["ad_personalization"] == "denied"
+
+    engine.set_user_property("non_personalized_ads(_npa)", "0")
+    changed, state = apply(engine)
+    assert changed
+    assert state["ad_personalization"] == "granted"
+
+
+def test_reset():
+    engine = ConsentEngine()
+    engine.set_user_property("non_personalized_ads", "1")
+    apply(engine, ad_storage="granted")
+    engine.reset()
+    assert engine.npa is None
+    assert engine.current == dict.fromkeys(CONSENT_FIELDS)
@@ -0,0 +1,39 @@
+# Android GA Tracking Debugger
+# Copyright (c) 2025 Alejandro Reinoso
+#
+# This software is licensed under the Custom Shared-Profit License (CSPL) v1.0.
+# See the LICENSE.txt file for details.
+
+from src.consent_timeline import ConsentTimeline, EMPTY_CONSENT
+from src.model import DataModel
+
+
+def test_at_returns_the_snapshot_in_force():
+    timeline = ConsentTimeline()
+    granted = timeline.record({"ts": 100, "analytics_storage": "granted"})
+    denied = timeline.record({"ts": 200, "analytics_storage": "denied"})
+    assert timeline.at(50) is EMPTY_CONSENT
+    assert timeline.at(100) is granted
+    assert timeline.at(199) is granted
+    assert timeline.at(10 ** 9) is denied
+
+
+def test_model_lookups():
+    model = DataModel()
+    model.apply_consent({"ts": 100, "analytics_storage": "granted"})
+    model.add_event({"ts": 150, "name": "a", "params": {}})
+    model.apply_consent({"ts": 200, "analytics_storage": "denied"})
+    model.add_event({"ts": 250, "name": "b", "params": {}})
+    assert model.consent_at(150).analytics_storage == "granted"
+    assert model.consent_at(250).ts == 200
+    # Events keep the snapshot in force when they were logged
+    assert [ev["consent"].analytics_storage for ev in model.events_data] == ["granted", "denied"]
+
+
+def test_out_of_order_snapshot_keeps_the_index_sorted():
+    timeline = ConsentTimeline()
+    timeline.record({"ts": 200, "ad_storage": "granted"})
+    late = timeline.record({"ts": 150, "ad_storage": "denied"})
+    assert timeline.at(200) is late
+    assert timeline.at(199) is EMPTY_CONSENT
+    assert len(timeline) == 2
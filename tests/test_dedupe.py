@@ -0,0 +1,39 @@
+# Android GA Tracking Debugger
+# Copyright (c) 2025 Alejandro Reinoso
+#
+# This software is licensed under the Custom Shared-Profit License (CSPL) v1.0.
+# See the LICENSE.txt file for details.
+
+from src.dedupe import EventDeduplicator
+from src.log_parser import parse_logging_event_line
+from src.timestamps import LogClock
+
+EVENT = "Logging event: origin=app,name=purchase,params=Bundle[{value=1, currency=EUR}]"
+
+
+def line(time, tag):
+    return f"05-01 10:00:{time} V/{tag:<8}( 4321): {EVENT}"
+
+
+def duplicates(lines):
+    clock = LogClock()
+    dedupe = EventDeduplicator()
+    return [dedupe.is_duplicate(parse_logging_event_line(text, clock)) for text in lines]
+
+
+def test_copy_from_the_other_tag_is_suppressed():
+    assert duplicates([line("00.000", "FA"), line("00.010", "FA-SVC")]) == [False, True]
+
+
+def test_repeat_from_the_same_tag_is_kept():
+    assert duplicates([line("00.000", "FA"), line("00.200", "FA")]) == [False, False]
+
+
+def test_each_hit_hides_one_copy():
+    assert duplicates([line("00.000", "FA"), line("00.100", "FA"),
+                       line("00.200", "FA-SVC"), line("00.300", "FA-SVC"),
+                       line("00.400", "FA-SVC")]) == [False, False, True, True, False]
+
+
+def test_copy_outside_the_window_is_kept():
+    assert duplicates([line("00.000", "FA"), line("02.000", "FA-SVC")]) == [False, False]
@@ -0,0 +1,115 @@
+# Android GA Tracking Debugger
+# Copyright (c) 2025 Alejandro Reinoso
+#
+# This software is licensed under the Custom Shared-Profit License (CSPL) v1.0.
+# See the LICENSE.txt file for details.
+
+import os
+import csv
+import json
+from datetime import datetime, timezone
+
+from src.exporter import (ExportJob, event_record, user_property_record,
+                          file_source, model_source)
+from src.log_parser import (classify_line, parse_logging_event_line,
+                            parse_user_property_line, parse_consent_line,
+                            LINE_EVENT, LINE_USER_PROPERTY, LINE_CONSENT)
+from src.model import DataModel
+from src.timestamps import LogClock
+
+
+def test_records_carry_epoch_milliseconds_and_sequence():
+    clock = LogClock()
+    first = clock.stamp("05-01 10:00:00.000 V/FA")
+    second = clock.stamp("05-01 10:00:00.000 V/FA")
+    record = event_record({"ts": second, "name": "purchase", "params": {}})
+    expected = datetime(clock.year, 5, 1, 10, tzinfo=timezone.utc).timestamp() * 1000
+    assert record["ts"] == expected
+    assert record["seq"] == 1
+    assert record["datetime"] == f"{clock.year}-05-01 10:00:00.000"
+    assert event_record({"ts": first, "name": "purchase", "params": {}})["seq"] == 0
+
+
+def test_record_without_time():
+    record = user_property_record({"name": "plan", "value": "pro"})
+    assert (record["ts"], record["seq"], record["datetime"]) == (None, None, "")
+
+
+SESSION = os.path.join(os.path.dirname(__file__), "fixtures", "session.log")
+
+
+def live_model(path):
+    """A DataModel fed with the lines of 'path' the way App does."""
+    model = DataModel()
+    model.clock.reset(os.path.getmtime(path))
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            kind = classify_line(line)
+            if kind == LINE_EVENT:
+                model.add_event(parse_logging_event_line(line, model.clock))
+            elif kind == LINE_USER_PROPERTY:
+                up = parse_user_property_line(line, model.clock)
+                if model.set_user_property(up):
+                    model.apply_consent({"ts": up["ts"]})
+            elif kind == LINE_CONSENT:
+                model.apply_consent(parse_consent_line(line, model.clock))
+    return model
+
+
+def export(source, path):
+    job = ExportJob(source, str(path)).start()
+    job.thread.join()
+    assert job.error is None
+    assert job.progress == 1.0
+    return path.read_text(encoding="utf-8")
+
+
+def test_model_and_file_sources_match():
+    from_file = [record for record, _progress in file_source(SESSION)()]
+    from_model = [record for record, _progress in model_source(live_model(SESSION))()]
+    assert from_model == from_file
+    assert [r["type"] for r in from_file] == [
+        "consent", "event", "user_property", "event", "user_property",
+        "user_property", "consent", "consent", "event"]
+
+
+def test_jsonl_round_trip(tmp_path):
+    expected = [record for record, _progress in file_source(SESSION)()]
+    for source in (file_source(SESSION), model_source(live_model(SESSION))):
+        text = export(source, tmp_path / "session.jsonl")
+        assert [json.loads(line) for line in text.splitlines()] == expected
+
+
+def test_csv_round_trip(tmp_path):
+    expected = [record for record, _progress in file_source(SESSION)()]
+    for source in (file_source(SESSION), model_source(live_model(SESSION))):
+        export(source, tmp_path / "session.csv")
+        with open(tmp_path / "session.csv", encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        assert len(rows) == len(expected)
+        for row, record in zip(rows, expected):
+            assert row["type"] == record["type"]
+            assert int(row["ts"]) == record["ts"]
+            assert row["datetime"] == record["datetime"]
+            for key, value in record.get("params", {}).items():
+                assert row["param:" + key] == value
+        assert rows[3]["param:currency"] == "EUR"
+        assert rows[0]["param:currency"] == ""
+
+
+def test_failing_source_ends_the_job(tmp_path):
+    def broken():
+        yield {"type": "event"}, 0.5  # No params: KeyError in the CSV writer
+
+    job = ExportJob(broken, str(tmp_path / "session.csv")).start()
+    job.thread.join()
+    assert job.done
+    assert job.error.startswith("KeyError")
+
+
+def test_unknown_format(tmp_path):
+    job = ExportJob(file_source(SESSION), str(tmp_path / "session.txt")).start()
+    job.thread.join()
+    assert job.done
+    assert "Unknown export format" in job.error
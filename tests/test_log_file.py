@@ -0,0 +1,100 @@
+# Android GA Tracking Debugger
+# Copyright (c) 2025 Alejandro Reinoso
+#
+# This software is licensed under the Custom Shared-Profit License (CSPL) v1.0.
+# See the LICENSE.txt file for details.
+
+import os
+import queue
+import zipfile
+
+import pytest
+
+from src import log_file as log_file_module
+from src.log_file import LogFile, LogFileLoader, read_bugreport_logcat
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+LOGCAT = os.path.join(FIXTURES, "logcat.log")
+
+
+def fixture_lines(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    # Many blocks out of a small file
+    monkeypatch.setattr(log_file_module, "BLOCK_SIZE", 256)
+
+
+@pytest.fixture
+def bugreport(tmp_path):
+    path = tmp_path / "bugreport.zip"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("main_entry.txt", "bugreport-device-2026-05-01.txt")
+        zf.write(os.path.join(FIXTURES, "bugreport.txt"), "bugreport-device-2026-05-01.txt")
+    return str(path)
+
+
+def test_block_index(small_blocks):
+    log_file = LogFile(LOGCAT).open()
+    blocks = []
+    log_file.index(on_block=blocks.append)
+    expected = fixture_lines("logcat.log")
+    assert log_file.done and log_file.progress == 1.0
+    assert log_file.line_count == len(expected)
+    assert len(log_file.block_offsets) == len(blocks) > 1
+    assert [line for block in blocks for line in block] == expected
+    # Every block starts at a line
+    for offset in log_file.block_offsets[1:]:
+        assert log_file.data[offset - 1:offset] == b"\n"
+    log_file.close()
+
+
+def test_get_lines_seeks_across_blocks(small_blocks):
+    log_file = LogFile(LOGCAT).open()
+    log_file.index()
+    expected = fixture_lines("logcat.log")
+    for start in (0, 3, 17, len(expected) - 2):
+        assert log_file.get_lines(start, 7) == expected[start:start + 7]
+    assert log_file.get_lines(len(expected), 5) == []
+    assert log_file.get_lines(0, len(expected) + 10) == expected
+    log_file.close()
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / "empty.log"
+    path.write_bytes(b"")
+    log_file = LogFile(str(path)).open()
+    log_file.index()
+    assert log_file.line_count == 0
+    assert log_file.get_lines(0, 10) == []
+    log_file.close()
+
+
+def test_bugreport_keeps_the_ga_lines_of_the_logcat_sections(bugreport):
+    lines = read_bugreport_logcat(bugreport).decode("utf-8").splitlines()
+    assert [line.split("name=")[1].split(",")[0] for line in lines if "name=" in line] == [
+        "login", "purchase"]
+    assert len(lines) == 3  # The FA-SVC line too, not ActivityManager
+
+
+def test_loader_reads_the_bugreport_in_its_thread(bugreport):
+    log_file = LogFile(bugreport)
+    lines = queue.Queue()
+    loader = LogFileLoader(log_file, lines).start()
+    loader.thread.join(timeout=5)
+    assert loader.error is None
+    assert log_file.done and log_file.line_count == 3
+    assert lines.qsize() == 3
+    log_file.close()
+
+
+def test_loader_reports_open_errors(tmp_path):
+    path = tmp_path / "broken.zip"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("notes.txt", "not a bugreport")
+    loader = LogFileLoader(LogFile(str(path)), queue.Queue()).start()
+    loader.thread.join(timeout=5)
+    assert loader.error == "No bugreport text file found in the archive."
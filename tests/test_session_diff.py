@@ -0,0 +1,72 @@
+# Android GA Tracking Debugger
+# Copyright (c) 2025 Alejandro Reinoso
+#
+# This software is licensed under the Custom Shared-Profit License (CSPL) v1.0.
+# See the LICENSE.txt file for details.
+
+import random
+
+from src.session_diff import align, DiffJob
+
+
+def edited(seq, edits, rng):
+    seq = list(seq)
+    for _ in range(edits):
+        pos = rng.randrange(len(seq))
+        op = rng.randrange(3)
+        if op == 0:
+            del seq[pos]
+        elif op == 1:
+            seq.insert(pos, rng.randrange(8))
+        else:
+            seq[pos] = rng.randrange(8)
+    return seq
+
+
+def check_pairs(a, b, pairs):
+    assert all(a[i] == b[j] for i, j in pairs)
+    assert all(p[0] < q[0] and p[1] < q[1] for p, q in zip(pairs, pairs[1:]))
+
+
+def test_align_within_edit_limit():
+    rng = random.Random(1)
+    a = [rng.randrange(8) for _ in range(2000)]
+    b = edited(a, 20, rng)
+    pairs, truncated = align(a, b)
+    check_pairs(a, b, pairs)
+    assert not truncated
+    assert len(pairs) >= len(a) - 40
+
+
+def test_align_beyond_edit_limit_is_approximate():
+    # Few names (no unique anchors) and more scattered edits than the limit
+    rng = random.Random(2)
+    a = [rng.randrange(8) for _ in range(20000)]
+    b = edited(a, 300, rng)
+    pairs, truncated = align(a, b, max_d=100)
+    check_pairs(a, b, pairs)
+    assert truncated
+    assert len(pairs) >= len(a) - 1000
+
+
+def test_align_lines_up_again_after_an_inserted_block():
+    rng = random.Random(5)
+    a = [rng.randrange(8) for _ in range(20000)]
+    b = a[:5000] + [rng.randrange(8) for _ in range(1200)] + a[5000:]
+    # Scattered edits too, so trimming the common prefix and suffix is not enough
+    for pos in (100, 19000):
+        b[pos] = (b[pos] + 1) % 8
+    pairs, truncated = align(a, b)
+    check_pairs(a, b, pairs)
+    assert truncated
+    assert len(pairs) >= len(a) - 100
+
+
+def test_diff_job_reports_malformed_sessions(tmp_path):
+    path = tmp_path / "bad.jsonl"
+    path.write_text("[1, 2]\n", encoding="utf-8")
+    job = DiffJob(str(path), str(path)).start()
+    job.thread.join()
+    assert job.done
+    assert job.result is None
+    assert job.error.startswith("AttributeError")
@@ -0,0 +1,83 @@
+# Android GA Tracking Debugger
+# Copyright (c) 2025 Alejandro Reinoso
+#
+# This software is licensed under the Custom Shared-Profit License (CSPL) v1.0.
+# See the LICENSE.txt file for details.
+
+from src.stats import RateWindow, CardinalityEstimator, SessionStats
+from src.timestamps import TIE_BITS
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def event(name, time_ms, **params):
+    return {"ts": time_ms << TIE_BITS, "name": name, "params": params}
+
+
+def test_rate_window_slides():
+    rate = RateWindow(window_ms=60000, buckets=60)
+    for time_ms in (0, 500, 30000, 59999):
+        rate.add(time_ms)
+    assert rate.count(59999) == 4
+    assert rate.count(60000) == 2  # The first second left the window
+    assert rate.count(89999) == 2
+    assert rate.count(90000) == 1
+    assert rate.count(120000) == 0
+
+
+def test_rate_window_reuses_buckets():
+    rate = RateWindow(window_ms=60000, buckets=60)
+    rate.add(1000)
+    rate.add(61000)  # Same bucket, one window later
+    assert rate.count(61000) == 1
+
+
+def test_cardinality_is_exact_for_few_values():
+    estimator = CardinalityEstimator()
+    for i in range(50):
+        estimator.add(f"value{i % 40}")
+    assert estimator.estimate() == 40
+
+
+def test_cardinality_error_bound():
+    # 2^10 registers: standard error about 1.04 / 32 = 3.3%
+    for distinct in (1000, 20000):
+        estimator = CardinalityEstimator(precision=10)
+        for i in range(distinct):
+            estimator.add(f"user-{i}")
+            estimator.add(f"user-{i}")  # Repeats do not count
+        assert abs(estimator.estimate() - distinct) <= distinct * 0.12
+
+
+def test_session_stats_rows():
+    stats = SessionStats(clock=FakeClock())
+    stats.add_event(event("screen_view(_vs)", 0, screen="home"))
+    stats.add_event(event("screen_view", 1000, screen="cart"))
+    stats.add_event(event("purchase", 2000, screen="cart", value="10"))
+    assert stats.event_rows() == [("screen_view", 2, 2), ("purchase", 1, 1)]
+    assert stats.param_rows() == [("screen", 2), ("value", 1)]
+
+
+def test_rates_drop_when_the_stream_stalls():
+    clock = FakeClock()
+    stats = SessionStats(clock=clock)
+    stats.add_event(event("purchase", 10000))
+    clock.now += 30
+    assert stats.event_rows() == [("purchase", 1, 1)]
+    clock.now += 31
+    assert stats.event_rows() == [("purchase", 1, 0)]
+
+
+def test_clear():
+    stats = SessionStats(clock=FakeClock())
+    stats.add_event(event("purchase", 0, value="1"))
+    stats.clear()
+    assert stats.event_rows() == []
+    assert stats.param_rows() == []
+    assert stats.now_ms() is None
@@ -0,0 +1,92 @@
+# Android GA Tracking Debugger
+# Copyright (c) 2025 Alejandro Reinoso
+#
+# This software is licensed under the Custom Shared-Profit License (CSPL) v1.0.
+# See the LICENSE.txt file for details.
+
+import json
+import time
+import socket
+import threading
+
+import pytest
+
+from src.stream_server import StreamServer, _Subscriber
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.01)
+
+
+def read_records(reader, count):
+    return [json.loads(reader.readline()) for _ in range(count)]
+
+
+@pytest.fixture
+def server():
+    server = StreamServer(port=0)
+    server.start()
+    yield server
+    server.stop()
+
+
+def connect(server):
+    port = server.server_socket.getsockname()[1]
+    client = socket.create_connection(("127.0.0.1", port), timeout=5)
+    wait_for(lambda: server.subscribers)
+    return client
+
+
+def test_subscriber_receives_ndjson(server):
+    client = connect(server)
+    reader = client.makefile("r", encoding="utf-8")
+    server.publish({"type": "event", "name": "purchase", "params": {"value": "1"}})
+    server.publish({"type": "consent", "ad_storage": "granted"})
+    assert read_records(reader, 2) == [
+        {"type": "event", "name": "purchase", "params": {"value": "1"}},
+        {"type": "consent", "ad_storage": "granted"}]
+    client.close()
+
+
+def test_event_filter(server):
+    client = connect(server)
+    reader = client.makefile("r", encoding="utf-8")
+    client.sendall(b'{"events": ["purchase"]}\n')
+    wait_for(lambda: server.subscribers[0].events is not None)
+    server.publish({"type": "event", "name": "login", "params": {}})
+    server.publish({"type": "event", "name": "purchase(_p)", "params": {}})
+    server.publish({"type": "user_property", "name": "plan", "value": "pro"})
+    assert [r["name"] for r in read_records(reader, 2)] == ["purchase(_p)", "plan"]
+    client.close()
+
+
+def test_closed_subscriber_is_removed(server):
+    client = connect(server)
+    client.close()
+    wait_for(lambda: server.subscribers[0].closed)
+    server.publish({"type": "consent"})
+    assert server.subscribers == []
+
+
+def test_slow_subscriber_drops_the_oldest_records():
+    ours, theirs = socket.socketpair()
+    sub = _Subscriber(ours, buffer_size=5)
+    # The client has not read anything yet: only the newest records are kept
+    for i in range(12):
+        sub.offer((json.dumps({"n": i}) + "\n").encode("utf-8"))
+    threading.Thread(target=sub.send_loop, daemon=True).start()
+    reader = theirs.makefile("r", encoding="utf-8")
+    assert read_records(reader, 6) == [{"type": "dropped", "count": 7}] + [
+        {"n": i} for i in range(7, 12)]
+    sub.close()
+    theirs.close()
+
+
+def test_port_in_use(server):
+    other = StreamServer(port=server.server_socket.getsockname()[1])
+    with pytest.raises(OSError):
+        other.start()
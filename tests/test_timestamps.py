@@ -0,0 +1,69 @@
+# Android GA Tracking Debugger
+# Copyright (c) 2025 Alejandro Reinoso
+#
+# This software is licensed under the Custom Shared-Profit License (CSPL) v1.0.
+# See the LICENSE.txt file for details.
+
+import time
+from src.timestamps import LogClock, format_timestamp
+
+
+def reference(*date_time):
+    return time.mktime(date_time + (0, 0, -1))
+
+
+def stamp_all(clock, prefixes):
+    return [clock.stamp(prefix + " I/FA( 1): x") for prefix in prefixes]
+
+
+def test_year_inferred_from_reference():
+    clock = LogClock(reference(2026, 1, 31, 23, 0, 0))
+    key, = stamp_all(clock, ["02-01 00:30:00.000"])  # within the day of slack
+    assert format_timestamp(key, True) == "2026-02-01 00:30:00.000"
+
+    clock = LogClock(reference(2025, 12, 31, 23, 0, 0))
+    key, = stamp_all(clock, ["01-01 00:30:00.000"])
+    assert format_timestamp(key, True) == "2026-01-01 00:30:00.000"
+
+    clock = LogClock(reference(2026, 3, 1, 12, 0, 0))
+    key, = stamp_all(clock, ["06-01 10:00:00.000"])  # can not be in the future
+    assert format_timestamp(key, True) == "2025-06-01 10:00:00.000"
+
+
+def test_leap_day():
+    clock = LogClock(reference(2026, 3, 10, 12, 0, 0))
+    key, = stamp_all(clock, ["02-29 10:00:00.000"])
+    assert format_timestamp(key, True) == "2024-02-29 10:00:00.000"
+
+    clock = LogClock(reference(2026, 3, 10, 12, 0, 0))
+    keys = stamp_all(clock, ["02-28 23:59:59.000", "02-29 00:00:01.000"])
+    assert keys[0] < keys[1]
+    assert format_timestamp(keys[0], True) == "2026-02-28 23:59:59.000"
+
+
+def test_new_year_rollover():
+    clock = LogClock(reference(2026, 1, 2, 12, 0, 0))
+    keys = stamp_all(clock, ["12-31 23:59:59.998", "01-01 00:00:00.001"])
+    assert keys[0] < keys[1]
+    assert [format_timestamp(k, True) for k in keys] == [
+        "2025-12-31 23:59:59.998", "2026-01-01 00:00:00.001"]
+
+
+def test_lines_without_timestamp_take_the_previous_time():
+    clock = LogClock(reference(2026, 5, 2, 12, 0, 0))
+    first = clock.stamp("05-01 10:00:00.000 I/FA( 1): x")
+    second = clock.stamp("--------- beginning of main")
+    assert second > first
+    assert format_timestamp(second) == "05-01 10:00:00.000"
+
+
+def test_out_of_order_lines_keep_their_time():
+    clock = LogClock(reference(2026, 5, 2, 12, 0, 0))
+    keys = stamp_all(clock, ["05-01 09:00:05.000", "05-01 09:00:04.000",
+                             "05-01 09:00:05.000", "05-01 09:00:05.000"])
+    assert [format_timestamp(k) for k in keys] == [
+        "05-01 09:00:05.000", "05-01 09:00:04.000",
+        "05-01 09:00:05.000", "05-01 09:00:05.000"]
+    assert len(set(keys)) == 4
+    # Same millisecond => arrival order
+    assert keys[1] < keys[0] < keys[2] < keys[3]
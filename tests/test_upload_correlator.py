@@ -0,0 +1,91 @@
+# Android GA Tracking Debugger
+# Copyright (c) 2025 Alejandro Reinoso
+#
+# This software is licensed under the Custom Shared-Profit License (CSPL) v1.0.
+# See the LICENSE.txt file for details.
+
+import os
+from src.log_parser import parse_logging_event_line
+from src.timestamps import LogClock
+from src.upload_correlator import UploadCorrelator, correlate_lines, upload_key
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def correlate(fixture):
+    with open(os.path.join(FIXTURES, fixture), encoding="utf-8") as f:
+        dispatches, never_uploaded = correlate_lines(f)
+    latencies = {d.event["name"]: d.latency_ms for d in dispatches}
+    return latencies, [ev["name"] for ev in never_uploaded]
+
+
+def test_upload_key_matches_aliases():
+    assert upload_key("screen_view(_vs)") == "_vs"
+    assert upload_key(" purchase ") == "purchase"
+
+
+def test_complete_dump():
+    latencies, never_uploaded = correlate("upload_complete.log")
+    assert latencies == {"screen_view(_vs)": 2300, "purchase": 1800}
+    assert never_uploaded == []
+
+
+def test_truncated_dump_does_not_swallow_later_batches():
+    latencies, never_uploaded = correlate("upload_truncated.log")
+    assert latencies == {"purchase": 2300, "login": 2400}
+    assert never_uploaded == []
+
+
+def test_upload_without_dump_keeps_batches_in_step():
+    latencies, never_uploaded = correlate("upload_no_dump.log")
+    assert latencies == {"login": 2200, "purchase": 2500}
+    assert never_uploaded == []
+
+
+def test_failed_upload_stays_pending_until_retry():
+    latencies, never_uploaded = correlate("upload_failed_retry.log")
+    assert latencies == {"purchase": 30250}
+    assert never_uploaded == []
+
+
+def upload_lines(time, names):
+    """An upload start followed by the dump of a batch with 'names'."""
+    svc = f"05-01 {time} V/FA-SVC  ( 4321): "
+    lines = [svc + "Uploading data. app, uncompressed size, data: com.example.app, 256,",
+             svc + "batch {", svc + "  bundle {"]
+    for name in names:
+        lines += [svc + "    event {", svc + f"      name: {name}", svc + "    }"]
+    return lines + [svc + "  }", svc + "}"]
+
+
+def test_batches_without_response_are_dropped_by_age():
+    lines = []
+    for second in range(20):
+        lines.append(f"05-01 10:00:{second:02d}.000 V/FA      ( 4321): Logging event: "
+                     "origin=app,name=purchase,params=Bundle[{value=1}]")
+        lines += upload_lines(f"10:00:{second:02d}.100", ["purchase"])
+    lines.append("05-01 10:05:00.000 V/FA      ( 4321): Logging event: "
+                 "origin=app,name=login,params=Bundle[{method=email}]")
+    lines += upload_lines("10:05:01.000", ["login"])
+    lines.append("05-01 10:05:01.500 V/FA-SVC  ( 4321): "
+                 "Successful upload. Got network response. code, size: 204, 0")
+
+    clock = LogClock()
+    correlator = UploadCorrelator(clock)
+    dispatches = []
+    for line in lines:
+        if "Logging event" in line:
+            dispatches += correlator.track(parse_logging_event_line(line, clock))
+        else:
+            dispatches += correlator.feed(line)
+    assert [(d.event["name"], d.latency_ms) for d in dispatches] == [("login", 1500)]
+    assert correlator.dropped_uploads == 20
+
+
+def test_awaiting_batches_are_bounded():
+    clock = LogClock()
+    correlator = UploadCorrelator(clock, max_awaiting=8)
+    for second in range(10):
+        for line in upload_lines(f"10:00:{second:02d}.000", ["purchase"]):
+            correlator.feed(line)
+    assert correlator.dropped_uploads == 2
@@ -0,0 +1,108 @@
+# Android GA Tracking Debugger
+# Copyright (c) 2025 Alejandro Reinoso
+#
+# This software is licensed under the Custom Shared-Profit License (CSPL) v1.0.
+# See the LICENSE.txt file for details.
+
+import random
+
+from src.log_parser import strip_alias
+from src.validator import Validator, EVENT_NAME_PATTERN
+
+RULES = {
+    "limits": {"event_name_length": 12, "param_name_length": 10,
+               "param_value_length": 8, "param_count": 3},
+    "reserved_event_names": ["first_open", "session_start"],
+    "reserved_prefixes": ["firebase_", "ga_"],
+    "ignored_param_prefixes": ["ga_", "_"],
+    "events": {
+        "*": {"enums": {"platform": ["android", "ios"]}},
+        "purchase": {"required": ["value", "currency"],
+                     "enums": {"currency": ["EUR", "USD"]}},
+    },
+}
+
+
+def reference_verdicts(rules, ev):
+    """The rules evaluated directly on every event, without dispatch tables."""
+    limits = rules["limits"]
+    name = strip_alias(ev["name"])
+    params = {strip_alias(k): v for k, v in ev["params"].items()}
+    verdicts = []
+    if ev.get("origin") != "auto":
+        if name in rules["reserved_event_names"]:
+            verdicts.append(("reserved_name", {"name": name}))
+        elif any(name.startswith(p) for p in rules["reserved_prefixes"]):
+            verdicts.append(("reserved_prefix", {"name": name}))
+        if not EVENT_NAME_PATTERN.match(name):
+            verdicts.append(("invalid_name", {"name": name}))
+        if len(name) > limits["event_name_length"]:
+            verdicts.append(("name_too_long", {"limit": limits["event_name_length"]}))
+    counted = [(k, v) for k, v in params.items()
+               if not any(k.startswith(p) for p in rules["ignored_param_prefixes"])]
+    for k, v in counted:
+        if len(k) > limits["param_name_length"]:
+            verdicts.append(("param_name_too_long", {"param": k, "limit": limits["param_name_length"]}))
+        if len(v) > limits["param_value_length"]:
+            verdicts.append(("param_value_too_long", {"param": k, "limit": limits["param_value_length"]}))
+    if len(counted) > limits["param_count"]:
+        verdicts.append(("too_many_params", {"count": len(counted), "limit": limits["param_count"]}))
+    for plan in (rules["events"]["*"], rules["events"].get(name, {})):
+        for k in plan.get("required", []):
+            if k not in params:
+                verdicts.append(("missing_required", {"param": k}))
+        for k, allowed in plan.get("enums", {}).items():
+            if k in params and params[k] not in allowed:
+                verdicts.append(("invalid_value", {"param": k, "value": params[k]}))
+    return verdicts
+
+
+def verdicts(validator, name, origin="app", **params):
+    return [(v.rule, v.args) for v in
+            validator.check({"name": name, "origin": origin, "params": params})]
+
+
+def test_each_rule():
+    validator = Validator(RULES)
+    assert verdicts(validator, "login") == []
+    assert verdicts(validator, "first_open") == [("reserved_name", {"name": "first_open"})]
+    assert verdicts(validator, "first_open", origin="auto") == []
+    assert verdicts(validator, "ga_custom") == [("reserved_prefix", {"name": "ga_custom"})]
+    assert verdicts(validator, "2fast") == [("invalid_name", {"name": "2fast"})]
+    assert verdicts(validator, "a_very_long_name") == [("name_too_long", {"limit": 12})]
+    assert verdicts(validator, "login", long_param_x="1") == [
+        ("param_name_too_long", {"param": "long_param_x", "limit": 10})]
+    assert verdicts(validator, "login", method="google_sso") == [
+        ("param_value_too_long", {"param": "method", "limit": 8})]
+    assert verdicts(validator, "login", a="1", b="2", c="3", d="4", ga_x="5") == [
+        ("too_many_params", {"count": 4, "limit": 3})]
+    assert verdicts(validator, "purchase", value="1") == [
+        ("missing_required", {"param": "currency"})]
+    assert verdicts(validator, "purchase", value="1", currency="GBP") == [
+        ("invalid_value", {"param": "currency", "value": "GBP"})]
+    assert verdicts(validator, "login", platform="web") == [
+        ("invalid_value", {"param": "platform", "value": "web"})]
+    # Aliases are stripped from names and parameters
+    assert verdicts(validator, "purchase(_p)", **{"value(_v)": "1", "currency": "EUR"}) == []
+
+
+def test_counts_per_session():
+    validator = Validator(RULES)
+    verdicts(validator, "purchase")
+    verdicts(validator, "purchase")
+    assert validator.counts["missing_required"] == 4
+    validator.reset()
+    assert not validator.counts
+
+
+def test_dispatch_table_gives_the_same_verdicts_as_the_rules():
+    rng = random.Random(7)
+    names = ["login", "purchase", "purchase(_p)", "first_open", "ga_custom",
+             "2fast", "a_very_long_name", "session_start"]
+    keys = ["value", "currency", "platform", "method", "long_param_x", "ga_x", "_y", "z"]
+    values = ["1", "EUR", "GBP", "android", "web", "google_sso"]
+    validator = Validator(RULES)
+    for _ in range(2000):
+        ev = {"name": rng.choice(names), "origin": rng.choice(["app", "auto"]),
+              "params": {k: rng.choice(values) for k in rng.sample(keys, rng.randrange(6))}}
+        assert [(v.rule, v.args) for v in validator.check(ev)] == reference_verdicts(RULES, ev)
@@ -0,0 +1,46 @@
+# Android GA Tracking Debugger
+# Copyright (c) 2025 Alejandro Reinoso
+#
+# This software is licensed under the Custom Shared-Profit License (CSPL) v1.0.
+# See the LICENSE.txt file for details.
+
+import pytest
+from src.consent_timeline import EMPTY_CONSENT
+from src.watches import Watch, WatchError, WatchMatcher, parse_expression
+
+DENIED = EMPTY_CONSENT._replace(analytics_storage="denied")
+GRANTED = EMPTY_CONSENT._replace(analytics_storage="granted")
+
+
+def names(hits):
+    return [watch.name for watch in hits]
+
+
+def test_event_expressions():
+    matcher = WatchMatcher([
+        Watch("no_tid", 'event == "purchase" and not has("transaction_id")', False),
+        Watch("big", 'num(param("value")) > 100', False),
+    ])
+    ev = {"name": "purchase", "params": {"value": "200"}, "consent": GRANTED}
+    assert names(matcher.match_event(ev)) == ["no_tid", "big"]
+    ev = {"name": "purchase", "params": {"value": "abc", "transaction_id": "T1"}}
+    assert matcher.match_event(ev) == []
+
+
+def test_changed_only_fires_on_the_consent_change():
+    matcher = WatchMatcher([Watch(
+        "denied", 'changed("analytics_storage") and consent.analytics_storage == "denied"',
+        False)])
+    assert names(matcher.match_consent(DENIED, GRANTED)) == ["denied"]
+    assert matcher.match_consent(DENIED, DENIED) == []
+    ev = {"name": "purchase", "params": {}, "consent": DENIED}
+    assert matcher.match_event(ev) == []
+    assert matcher.match_user_property({"name": "plan", "value": "pro"}, DENIED) == []
+
+
+@pytest.mark.parametrize("expression", [
+    '__import__("os")', "event.__class__", 'changed("nope")', "lambda: 1", "event ==",
+])
+def test_rejected_expressions(expression):
+    with pytest.raises(WatchError):
+        parse_expression(expression)